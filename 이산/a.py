@@ -1,9 +1,27 @@
 import pandas as pd
+import numpy as np
 import random
 import json
+import os
 import sys
+import time
+from bisect import bisect
 from datetime import datetime, timedelta 
 
+from batch_engine import BatchSessionEngine, to_epoch_seconds
+from book_catalog import BookCatalog, SegmentBookSampler
+from event_buffer import (
+    EVENT_APP_LAUNCH, EVENT_DROP_OFF, EVENT_RECONNECT, EVENT_VIEW_MAIN_PAGE, RULE_EVENT_BASE, EventBufferBuilder,
+    event_names_for,
+)
+from sampler import WeightedSampler
+from scheduler import ArrivalScheduler, epoch_to_datetime
+from sinks import CsvSink, PartitionedParquetSink, UserSortedSink
+from summary import SessionSummarizer
+from transitions import compile_transitions
+from user_state import ANONYMOUS_USER_ID, UserStateStore, category_flag_bits
+from user_store import UserPoolStore, current_rss_mb
+
 # ----------------------------------------------------
 # 1. Config 클래스: 규칙 및 확률 정의
 # ----------------------------------------------------
@@ -17,6 +35,11 @@ class Config:
     # 사용자 활동 빈도 티어 (세션 할당 가중치)
     SESSION_FREQUENCY_TIERS = {'High': 0.6, 'Medium': 0.3, 'Low': 0.1}
 
+    # 유저 샘플러에서 한 번에 미리 뽑아두는 유저 수
+    USER_SAMPLE_BATCH_SIZE = 4096
+    # scalar 엔진이 EventBuffer 하나에 모으는 세션 수
+    SCALAR_BLOCK_SESSIONS = 2000
+
     # 행동 시나리오 확률
     PROB_ON_LOGIN_ATTEMPT = {'login_success': 0.9, 'drop-off': 0.1}
     
@@ -77,12 +100,82 @@ class Config:
         'PROB_ACTION_AFTER_PROMOTION': (3, 8) 
     }
 
+    # 행동(action) → 다음 상태 규칙. 'MAINPAGE'는 로그인 여부에 따라 메인 페이지 규칙으로 결정
+    ACTION_NEXT_RULE = {
+        'click_item': 'PROB_VIEW_ITEM_LOGIN', 'item': 'PROB_VIEW_ITEM_LOGIN',
+        'login_success': 'MAINPAGE',
+        'login': 'PROB_ON_LOGIN_ATTEMPT',
+        'mypage': 'PROB_MYPAGE_LOGIN',
+        'search': 'PROB_VIEW_ITEM_LIST', 'search_text': 'PROB_VIEW_ITEM_LIST',
+        'view_recommended_item': 'PROB_VIEW_ITEM_LIST',
+        'add_to_cart': 'PROB_ACTION_AFTER_ADD_TO_CART',
+        'view_cart': 'PROB_ACTION_AFTER_VIEW_CART',
+        'purchase': 'PROB_PURCHASE_CLEAR',
+        'buy_baro': 'PROB_BARO_SHOP',
+        'choose_shop': 'PROB_BARO_VISIT',
+        'choose_visit': 'PROB_BARO_PURCHASE',
+        'order_detail': 'PROB_ORDER_DETAIL',
+        'promotion': 'PROB_ACTION_AFTER_PROMOTION',
+        'mainpage': 'MAINPAGE', 'return_mainpage': 'MAINPAGE', 'return_item_list': 'MAINPAGE',
+        'abandon': 'MAINPAGE', 'recommand': 'MAINPAGE',
+    }
+    MAINPAGE_RULES = {'login': 'PROB_MAINPAGE_LOGIN', 'not_login': 'PROB_MAINPAGE_NOT_LOGIN'}
+
+    DROP_OFF_ACTION = 'drop-off'
+    RECONNECT_PROB = 0.5  # drop-off 후 재접속 확률
+    LOGIN_ACTIONS = ['login_success']            # 로그인 상태로 전환되는 행동
+    ITEM_PICK_ACTIONS = ['click_item', 'item']   # 책을 새로 고르는 행동
+    ITEM_RELEASE_ACTIONS = ['return_item_list', 'return_mainpage']  # 책 정보를 해제하는 행동
+
+    # 책 정보가 이벤트 properties에 유지되는 페이지 / 책 정보가 해제되는 페이지
+    ITEM_CONTEXT_RULES = [
+        'PROB_VIEW_ITEM_LOGIN', 'PROB_ACTION_AFTER_ADD_TO_CART',
+        'PROB_ACTION_AFTER_VIEW_CART', 'PROB_PURCHASE_CLEAR',
+        'PROB_BARO_SHOP', 'PROB_BARO_VISIT', 'PROB_BARO_PURCHASE'
+    ]
+    ITEM_RESET_RULES = ['PROB_MAINPAGE_LOGIN', 'PROB_MAINPAGE_NOT_LOGIN', 'PROB_VIEW_ITEM_LIST']
+
+    # 서적 선호도: 유저 세그먼트별 카테고리 가중치 배수 (목록에 없는 카테고리는 1.0)
+    # 최종 카테고리 가중치 = 카테고리별 purchase_weight 합 × 나이대 배수 × 성별 배수 × ever_* 배수
+    CATEGORY_PREFERENCE_BY_AGE = [  # (나이 상한(미만), 배수), 마지막 구간 이상은 CATEGORY_PREFERENCE_AGE_DEFAULT
+        (14, {'어린이': 3.0, 'IT/컴퓨터': 0.3}),
+        (20, {'외국어': 1.5, '어린이': 0.5}),
+        (30, {'IT/컴퓨터': 1.3, '외국어': 1.3, '어린이': 0.5}),
+        (45, {'IT/컴퓨터': 1.3, '어린이': 1.5}),
+        (60, {'소설/문학': 1.2}),
+    ]
+    CATEGORY_PREFERENCE_AGE_DEFAULT = {'소설/문학': 1.5, 'IT/컴퓨터': 0.5}
+    CATEGORY_PREFERENCE_BY_GENDER = {'여성': {'소설/문학': 1.2}, '남성': {'IT/컴퓨터': 1.2}}
+    CATEGORY_PREFERENCE_BY_EVER = {  # 플래그가 True인 유저에게만 적용
+        'ever_M': {'소설/문학': 1.3},
+        'ever_Y': {'외국어': 1.3},
+        'ever_K': {'어린이': 2.0},
+    }
+    SEGMENT_SAMPLER_CACHE_SIZE = 256  # 세그먼트별 카테고리 분포 LRU 캐시 크기
+
+    # 세션 요약 (summary.SessionSummarizer)
+    PURCHASE_RULES = ['PROB_PURCHASE_CLEAR']  # 구매 완료로 집계하는 페이지
+    TRAFFIC_SOURCE_RATIO = {'direct': 0.55, 'push': 0.2, 'ad': 0.25}  # 세션 유입 경로 비율
+
+    # 유저별 상태 (user_state.UserStateStore)
+    # 이 카테고리의 책을 구매하면 해당 ever_* 플래그가 True로 바뀌고 이후 세션의 서적 선호에 반영된다
+    EVER_FLAG_PURCHASE_CATEGORIES = {'ever_M': ['소설/문학'], 'ever_Y': ['외국어'], 'ever_K': ['어린이']}
+    ANONYMOUS_SESSION_RATIO = 0.0   # 로그인하지 않고 구경만 하는 익명 방문자 세션 비율 (user_id = 0, 기본은 사용 안 함)
+    # 익명 방문자가 할 수 없는 행동 (LOGIN_ACTIONS와 함께 drop-off로 바뀜): 장바구니/바로구매/구매로 들어가는 행동
+    ANONYMOUS_BLOCKED_ACTIONS = ['add_to_cart', 'buy_baro', 'purchase']
+    USER_STATE_SNAPSHOT_DAYS = 7    # 유저 상태 스냅샷 주기 (병렬 시간 샤드는 이 주기 단위로 상태를 합친다)
+
 # ----------------------------------------------------
 # 2. 메인 데이터 생성기 클래스
 # ----------------------------------------------------
 class SyntheticDataGenerator:
+    # 이벤트 블록 빌더 / batch 엔진 생성자 (profiler.GenerationProfiler가 계측 래퍼로 바꿔 끼운다)
+    event_builder_factory = EventBufferBuilder
+    batch_engine_factory = BatchSessionEngine
+
     def __init__(self, config, book_db, input_data, user_pool_path='user_pool.csv'):
-        self.config = config
+        init_start = time.perf_counter()
+        self._load_settings(config, input_data)
         
         # 서적 DB 로드 및 검증
         self.book_db = book_db
@@ -90,211 +183,457 @@ class SyntheticDataGenerator:
             if 'purchase_weight' not in self.book_db.columns:
                 print("⚠️ 경고: book_db에 'purchase_weight' 컬럼이 없습니다. 가중치를 1로 설정합니다.")
                 self.book_db['purchase_weight'] = 1 
+        self.catalog = BookCatalog.from_book_db(self.book_db)
         
-        # 설정 데이터 로드
-        self.total_sessions = input_data.get('total_sessions', 100)
-        self.start_date = datetime.strptime(input_data['start_date'], '%Y-%m-%d')
-        self.end_date = datetime.strptime(input_data['end_date'], '%Y-%m-%d')
-        
-        # User Pool 로드
+        # User Pool 로드 (같은 이름의 Parquet/Feather 파일이 있으면 우선 사용)
         try:
-            self.user_pool = pd.read_csv(user_pool_path)
+            user_pool_path = self._resolve_user_pool_path(user_pool_path)
+            self.user_pool = self._read_user_pool(user_pool_path)
             print(f"✅ 사용자 풀 ('{user_pool_path}') 로딩 성공!")
         except FileNotFoundError:
-            print(f"⚠️ 사용자 풀 ('{user_pool_path}')을 찾을 수 없습니다. 종료합니다.")
-            sys.exit(0)
+            raise FileNotFoundError(f"사용자 풀 ('{user_pool_path}')을 찾을 수 없습니다.") from None
 
-        # 유저 샘플링
-        self.users_to_sample = input_data.get('users_to_sample', len(self.user_pool))
-        if self.users_to_sample < len(self.user_pool):
-            self.sampled_user_pool = self.user_pool.sample(n=self.users_to_sample, replace=False) 
+        # 유저 샘플링: 행 위치만 뽑고 DataFrame 전체 컬럼은 복사하지 않음
+        pool_size = len(self.user_pool)
+        self.users_to_sample = input_data.get('users_to_sample', pool_size)
+        if self.users_to_sample < pool_size:
+            self.sampled_positions = np.sort(
+                self.np_rng.choice(pool_size, size=self.users_to_sample, replace=False)
+            )
         else:
-            self.sampled_user_pool = self.user_pool
+            self.sampled_positions = None  # 전체 풀 사용 (복사/인덱싱 없는 빠른 경로)
+        self._sampled_user_pool = None
+        sampled_size = pool_size if self.sampled_positions is None else len(self.sampled_positions)
             
-        # 활동 빈도 티어 할당
-        tiers = list(self.config.SESSION_FREQUENCY_TIERS.keys())
-        tier_weights = list(self.config.SESSION_FREQUENCY_TIERS.values())
-        
-        assigned_tiers = random.choices(tiers, weights=tier_weights, k=len(self.sampled_user_pool))
-        self.sampled_user_pool['frequency_tier'] = assigned_tiers
+        # 활동 빈도 티어 할당 (티어 코드 배열)
+        self.frequency_tiers = list(self.config.SESSION_FREQUENCY_TIERS.keys())
+        tier_weights = np.array(list(self.config.SESSION_FREQUENCY_TIERS.values()), dtype=np.float64)
+        self.frequency_tier_codes = WeightedSampler(tier_weights).sample(self.np_rng, sampled_size).astype(np.int8)
         
-        # 세션 할당 가중치 계산
-        frequency_map = self.config.SESSION_FREQUENCY_TIERS
-        self.session_weights = [
-            frequency_map[self.sampled_user_pool.iloc[i]['frequency_tier']]
-            for i in range(len(self.sampled_user_pool))
-        ]
-        
-        # 가중치 정규화
-        weight_sum = sum(self.session_weights)
+        # 세션 할당 가중치 계산 및 정규화
+        self.session_weights = tier_weights[self.frequency_tier_codes]
+        weight_sum = self.session_weights.sum()
         if weight_sum > 0:
-            self.session_weights = [w / weight_sum for w in self.session_weights]
+            self.session_weights /= weight_sum
         else:
-            self.session_weights = [1.0 / len(self.sampled_user_pool)] * len(self.sampled_user_pool)
-            
+            self.session_weights = np.full(sampled_size, 1.0 / sampled_size)
+
+        # 유저 샘플러: 누적 가중치는 여기서 한 번만 계산하고, 세션마다 필요한 컬럼은 배열로 보관
+        if isinstance(self.user_pool, UserPoolStore):
+            gender_codes = self._sampled_column('gender')
+            gender_categories = self.user_pool.categories('gender')
+        else:
+            gender_codes, gender_categories = pd.factorize(self._sampled_column('gender'))
+        gender_categories = np.asarray(gender_categories, dtype=object)
+        ages = self._sampled_column('age')
+
+        # 세그먼트(나이대 × 성별 × ever_* 플래그)별 카테고리 선호 책 샘플러
+        book_sampler = SegmentBookSampler(self.catalog, config, gender_categories)
+        ever_flags = {
+            flag: self._sampled_column(flag)
+            for flag in book_sampler.ever_flags if flag in self.user_pool.columns
+        }
+        self._set_user_columns(
+            WeightedSampler(self.session_weights),
+            self._sampled_column('user_id'),
+            gender_codes.astype(np.int8),
+            gender_categories,
+            ages,
+            book_sampler.segment_codes(ages, gender_codes, ever_flags),
+        )
+        self.book_sampler = book_sampler
+        self._init_user_state(input_data.get('user_state_dir'))
+
+        self.startup_seconds = time.perf_counter() - init_start
+        self.startup_rss_mb = current_rss_mb()
+        rss_text = f", RSS {self.startup_rss_mb:.0f}MB" if self.startup_rss_mb is not None else ""
+        print(f"⏱️ 초기화 완료: 유저 {sampled_size}명, {self.startup_seconds:.2f}초{rss_text}")
+
+    @staticmethod
+    def _resolve_user_pool_path(user_pool_path):
+        """CSV 경로가 주어져도 user_pool.py가 함께 저장한 바이너리 파일이 최신이면 그것을 사용"""
+        base, ext = os.path.splitext(user_pool_path)
+        if ext.lower() != '.csv':
+            return user_pool_path
+        csv_mtime = os.path.getmtime(user_pool_path) if os.path.exists(user_pool_path) else None
+        for binary_ext in ('.store', '.parquet', '.feather'):
+            binary_path = base + binary_ext
+            if os.path.exists(binary_path) and (csv_mtime is None or os.path.getmtime(binary_path) >= csv_mtime):
+                return binary_path
+        return user_pool_path
+
+    @staticmethod
+    def _read_user_pool(user_pool_path):
+        if UserPoolStore.is_store(user_pool_path):
+            return UserPoolStore.open(user_pool_path)  # 컬럼은 접근할 때 메모리 매핑
+        ext = os.path.splitext(user_pool_path)[1].lower()
+        if ext == '.parquet':
+            return pd.read_parquet(user_pool_path)
+        if ext == '.feather':
+            return pd.read_feather(user_pool_path)
+        return pd.read_csv(user_pool_path)
+
+    def _load_settings(self, config, input_data):
+        """Config 컴파일 및 input_data 설정값 로드 (병렬 워커에서도 같은 방식으로 사용)"""
+        self.config = config
+        self.input_data = input_data
+        self.transitions = compile_transitions(config)  # 잘못된 전이 설정은 여기서 ValueError
+        self.seed = input_data.get('seed')
+        self.np_rng = np.random.default_rng(self.seed)
+        self.rng = random.Random(self.seed)
+
+        self.total_sessions = input_data.get('total_sessions', 100)
+        self.start_date = datetime.strptime(input_data['start_date'], '%Y-%m-%d')
+        self.end_date = datetime.strptime(input_data['end_date'], '%Y-%m-%d')
+
+        # 세션 시작 시각: load_profile(시간/요일/월별 강도 JSON)이 있으면 비균질 포아송 도착 스케줄러,
+        # 없으면 기존처럼 균등 간격 + 10% 노이즈. sessions_per_day가 있으면 세션 수도 스케줄러가 정한다.
+        self.scheduler = None
+        if input_data.get('load_profile') is not None:
+            self.scheduler = ArrivalScheduler(
+                input_data['load_profile'], self.start_date, self.end_date, seed=self.seed,
+                total_sessions=None if 'sessions_per_day' in input_data else self.total_sessions,
+                sessions_per_day=input_data.get('sessions_per_day'),
+            )
+            self.total_sessions = self.scheduler.total_sessions
+
+        # 세션 시뮬레이션 엔진: 'scalar'(세션 1개씩) 또는 'batch'(NumPy로 batch_size개씩 동시 진행)
+        self.engine = input_data.get('engine', 'scalar')
+        if self.engine not in ('scalar', 'batch'):
+            raise ValueError(f"알 수 없는 engine '{self.engine}' (scalar 또는 batch)")
+        self.batch_size = input_data.get('batch_size', 100000)
+
+        # 병렬(샤드) 모드: workers를 지정하면 세션 인덱스를 shard_size 단위로 나눠 샤드별 시드로 생성
+        self.workers = input_data.get('workers')
+        self.shard_size = input_data.get('shard_size', 10000)
+
+    def _set_user_columns(self, user_sampler, user_ids, gender_codes, gender_categories, ages, segments):
+        self.user_sampler = user_sampler
+        self._user_ids = user_ids
+        self._user_gender_codes = gender_codes
+        self._gender_categories = gender_categories
+        self._user_ages = ages
+        self._user_segments = segments
+        self._user_batch = np.empty(0, dtype=np.intp)
+        self._user_batch_pos = 0
+
+    def _init_user_state(self, snapshot_dir):
+        """유저별 가변 상태 저장소와 세션 루프에서 쓰는 구매 → 플래그 비트 표 구성"""
+        config = self.config
+        flag_names = self.book_sampler.ever_flags
+        ever_mask = self.book_sampler.n_ever_states - 1
+        self._segment_base_mask = ~ever_mask
+        self.user_state = UserStateStore(
+            len(self._user_segments), flag_names, int(to_epoch_seconds(self.start_date) // 86400),
+            initial_flags=np.asarray(self._user_segments) & ever_mask,
+            snapshot_days=config.USER_STATE_SNAPSHOT_DAYS, snapshot_dir=snapshot_dir, user_ids=self._user_ids,
+        )
+        if self.catalog.category_codes is not None:
+            flag_bits = category_flag_bits(self.catalog.categories, flag_names, config.EVER_FLAG_PURCHASE_CATEGORIES)
+            self._item_flag_bits = flag_bits[np.asarray(self.catalog.category_codes)]  # 책 인덱스 → 구매 시 켜지는 비트
+        else:
+            self._item_flag_bits = np.zeros(len(self.catalog), dtype=np.uint8)
+        purchase_rules = {self.transitions.rule_id[name] for name in config.PURCHASE_RULES if name in self.transitions.rule_id}
+        self._purchase_rule = [rule_id in purchase_rules for rule_id in range(len(self.transitions.rule_names))]
+        self.anonymous_ratio = config.ANONYMOUS_SESSION_RATIO
+
+    def user_segments(self, users):
+        """유저 인덱스 배열의 현재 세그먼트 코드 (ever 비트는 유저 상태 저장소 값)"""
+        return (self._user_segments[users] & self._segment_base_mask) | self.user_state.flags[users]
+
+    @classmethod
+    def _from_shared_state(cls, config, input_data, shared):
+        """
+        parallel.attach_shared_state()가 돌려준 (메모리 매핑된) 배열로 생성기를 구성.
+        CSV 로딩/유저 샘플링은 부모 프로세스에서 이미 끝났으므로 생략한다.
+        """
+        generator = cls.__new__(cls)
+        generator._load_settings(config, input_data)
+        generator.book_db = None  # 워커는 서적 DataFrame 대신 카탈로그 배열만 사용
+        generator.catalog = shared['catalog']
+        generator._set_user_columns(
+            WeightedSampler.from_cumulative(shared['user_cumulative']),
+            shared['user_ids'],
+            shared['user_gender_codes'],
+            shared['gender_categories'],
+            shared['user_ages'],
+            shared['user_segments'],
+        )
+        generator.book_sampler = SegmentBookSampler(generator.catalog, config, shared['gender_categories'])
+        generator._init_user_state(None)  # 워커 상태는 parallel.py가 시간 샤드마다 채우고 변경분을 돌려받는다
+        if shared.get('scheduler') is not None:
+            generator.scheduler = shared['scheduler']  # 부모와 같은 도착 시각 (seed 미지정이어도)
+            generator.total_sessions = generator.scheduler.total_sessions
+        return generator
+
+    def reseed(self, seed_sequence):
+        """np.random.SeedSequence로 두 RNG를 다시 시드 (샤드별 독립 난수 스트림)"""
+        self.np_rng = np.random.default_rng(seed_sequence)
+        self.rng = random.Random(int(seed_sequence.generate_state(1, np.uint64)[0]))
+        self._user_batch = np.empty(0, dtype=np.intp)
+        self._user_batch_pos = 0
+
+    def get_state(self):
+        """
+        체크포인트용 생성기 상태. 같은 설정으로 만든 생성기에 set_state()하면 이어서 같은 출력을 만든다.
+            rng:   두 RNG 상태 + 미리 뽑아둔 유저 인덱스 버퍼
+            users: 세션 사이에 바뀌는 유저별 상태 (UserStateStore)
+        """
+        return {
+            'rng': {
+                'random': self.rng.getstate(),
+                'numpy': self.np_rng.bit_generator.state,
+                'user_batch': self._user_batch.copy(),
+                'user_batch_pos': self._user_batch_pos,
+            },
+            'users': self.user_state.get_state(),
+        }
+
+    def set_state(self, state, restore_rng=True):
+        """get_state() 결과로 상태 복원 (restore_rng=False면 유저별 상태만)"""
+        if restore_rng:
+            rng_state = state['rng']
+            self.rng.setstate(rng_state['random'])
+            self.np_rng.bit_generator.state = rng_state['numpy']
+            self._user_batch = rng_state['user_batch']
+            self._user_batch_pos = rng_state['user_batch_pos']
+        if state.get('users'):
+            self.user_state.set_state(state['users'])
+
+    def _sampled_column(self, column):
+        """샘플링된 유저들의 컬럼 하나만 numpy 배열로 추출 (저장소면 범주형은 코드 배열)"""
+        if isinstance(self.user_pool, UserPoolStore):
+            values = self.user_pool.column(column)
+        else:
+            values = self.user_pool[column].to_numpy()
+        return values if self.sampled_positions is None else values[self.sampled_positions]
+
+    @property
+    def sampled_user_pool(self):
+        """샘플링된 유저 DataFrame (frequency_tier 포함). 필요할 때 한 번만 만든다."""
+        if self._sampled_user_pool is None:
+            if isinstance(self.user_pool, UserPoolStore):
+                sampled = self.user_pool.to_frame(self.sampled_positions)
+            elif self.sampled_positions is None:
+                sampled = self.user_pool.copy()
+            else:
+                sampled = self.user_pool.take(self.sampled_positions)
+            sampled['frequency_tier'] = pd.Categorical.from_codes(
+                self.frequency_tier_codes, categories=self.frequency_tiers
+            )
+            self._sampled_user_pool = sampled
+        return self._sampled_user_pool
+
+    def max_user_id(self):
+        """샘플링된 유저 중 가장 큰 user_id (sinks.UserSortedSink의 버킷 범위 계산용)"""
+        return int(self._user_ids.max())
+
+    def sample_user_indices(self, k):
+        """가중치에 따라 유저 k명의 (sampled_user_pool 기준) 위치 인덱스를 한 번에 추출"""
+        return self.user_sampler.sample(self.np_rng, k)
 
     def _get_random_user(self):
         """가중치에 따라 유저 1명 선택"""
-        selected_user_row = self.sampled_user_pool.sample(n=1, weights=self.session_weights).iloc[0]
+        if self._user_batch_pos >= len(self._user_batch):
+            self._user_batch = self.sample_user_indices(self.config.USER_SAMPLE_BATCH_SIZE)
+            self._user_batch_pos = 0
+        user_idx = self._user_batch[self._user_batch_pos]
+        self._user_batch_pos += 1
         
-        login_type = random.choices(
+        login_type = self.rng.choices(
             list(self.config.USER_INITIAL_LOGIN_RATIO.keys()), 
             weights=list(self.config.USER_INITIAL_LOGIN_RATIO.values()), k=1
         )[0]
         
         return {
-            'user_id': selected_user_row['user_id'],
-            'gender': selected_user_row['gender'],
-            'age': selected_user_row['age'],
+            'index': user_idx,
+            'user_id': self._user_ids[user_idx],
+            'gender': self._gender_categories[self._user_gender_codes[user_idx]],
+            'age': self._user_ages[user_idx],
+            'segment': (self._user_segments[user_idx] & self._segment_base_mask) | self.user_state.flags[user_idx],
             'initial_login_status': (login_type == 'login')
         }
 
     def _get_next_action(self, prob_dict):
-        return random.choices(list(prob_dict.keys()), weights=list(prob_dict.values()), k=1)[0]
-
-    def _generate_event(self, event_name, session_id, user_id, current_time, event_sequence, properties={}):
-        return {
-            'event_name': event_name,
-            'session_id': session_id,
-            'user_id': user_id,
-            'timestamp': current_time.isoformat(),
-            'event_sequence': event_sequence,
-            'properties': properties
-        }
+        return self.rng.choices(list(prob_dict.keys()), weights=list(prob_dict.values()), k=1)[0]
 
     def generate_sessions(self):
+        """전체 이벤트를 이벤트 dict 목록으로 반환 (대량 생성은 write_sessions()로 sink에 바로 기록)"""
         all_event_logs = []
+        for events in self.iter_session_events():
+            all_event_logs.extend(events.to_events())
+        print(f"총 {len(all_event_logs)}개의 이벤트 로그가 생성되었습니다.")
+        return all_event_logs
+
+    def iter_session_events(self):
+        """
+        이벤트를 세션 블록 단위 EventBuffer(struct-of-arrays)로 yield.
+        전체 이벤트를 메모리에 모으지 않으므로 sink로 바로 흘려보낼 수 있다.
+        """
         print(f"총 {self.total_sessions}개의 세션을 {self.start_date.date()} ~ {self.end_date.date()} 기간 동안 생성합니다.")
 
+        if self.workers:
+            from parallel import iter_sessions_parallel
+            yield from iter_sessions_parallel(self)
+        else:
+            yield from self._iter_session_range(0, self.total_sessions)
+        self.user_state.finish(int(to_epoch_seconds(self.end_date) // 86400))
+
+    def write_sessions(self, sink, summary=None, profiler=None):
+        """
+        이벤트를 생성하는 즉시 sink(sinks.EventSink)에 청크 단위로 기록하고 sink를 닫는다.
+        summary(summary.SessionSummarizer)를 주면 같은 블록으로 세션 요약도 함께 집계하고,
+        profiler(profiler.GenerationProfiler)를 주면 단계별 시간/처리량을 잰다.
+        """
+        if profiler is not None:
+            profiler.attach(self, sink=sink, summary=summary)
+        try:
+            with sink:
+                for events in self.iter_session_events():
+                    sink.write_buffer(events)
+                    if summary is not None:
+                        summary.add(events)
+                    if profiler is not None:
+                        profiler.block_done(events)
+            if summary is not None:
+                summary.close()
+        finally:
+            if profiler is not None:
+                profiler.detach()
+        print(f"총 {sink.rows_written}개의 이벤트 로그를 '{sink.path}'에 기록했습니다.")
+        return sink.rows_written
+
+    def _iter_session_range(self, first, last):
+        """세션 인덱스 [first, last) 구간의 세션 이벤트를 차례로 yield"""
         time_span = self.end_date - self.start_date
         time_step = time_span / self.total_sessions if self.total_sessions > 0 else timedelta(0)
-        
-        for i in range(self.total_sessions):
+
+        if self.engine == 'batch':
+            yield from self._iter_sessions_batch(first, last, time_step)
+            return
+
+        event_names = event_names_for(self.transitions)
+        for block_start in range(first, last, self.config.SCALAR_BLOCK_SESSIONS):
+            block_end = min(block_start + self.config.SCALAR_BLOCK_SESSIONS, last)
+            events = self.event_builder_factory(event_names, self.catalog)
+            for session_start_time in self._iter_start_datetimes(block_start, block_end, time_step):
+                self._create_one_session(session_start_time, events)
+            yield events.finish()
+
+    def _iter_start_datetimes(self, first, last, time_step):
+        """scalar 엔진용 세션 [first, last)의 시작 시각(datetime)"""
+        if self.scheduler is not None:
+            for epoch_seconds in self.scheduler.start_times(first, last).tolist():
+                yield epoch_to_datetime(epoch_seconds)
+            return
+
+        for i in range(first, last):
             max_noise_sec = int(time_step.total_seconds() * 0.1) if time_step.total_seconds() > 0 else 0
-            session_start_offset = time_step * i + timedelta(seconds=random.randint(0, max(0, max_noise_sec)))
-            session_start_time = self.start_date + session_start_offset
-            
-            session_events = self._create_one_session(session_start_time)
-            all_event_logs.extend(session_events)
-            
-        print(f"총 {len(all_event_logs)}개의 이벤트 로그가 생성되었습니다.")
-        return all_event_logs
+            session_start_offset = time_step * i + timedelta(seconds=self.rng.randint(0, max(0, max_noise_sec)))
+            yield self.start_date + session_start_offset
 
-    def _create_one_session(self, session_start_time):
+    def _iter_sessions_batch(self, first, last, time_step):
+        """BatchSessionEngine으로 batch_size개 세션씩 묶어서 생성"""
+        engine = self.batch_engine_factory(self)
+        step_sec = time_step.total_seconds()
+        max_noise_sec = max(0, int(step_sec * 0.1))
+        base_sec = to_epoch_seconds(self.start_date)
+
+        for block_start in range(first, last, self.batch_size):
+            block_end = min(block_start + self.batch_size, last)
+            if self.scheduler is not None:
+                session_start_times = self.scheduler.start_times(block_start, block_end)
+            else:
+                index = np.arange(block_start, block_end)
+                noise = self.np_rng.integers(0, max_noise_sec + 1, size=len(index))
+                session_start_times = base_sec + step_sec * index + noise
+            yield engine.run(session_start_times)
+
+    def _create_one_session(self, session_start_time, events):
+        """세션 1개를 시뮬레이션해 events(EventBufferBuilder)에 이벤트를 추가"""
         user = self._get_random_user()
+        # 익명 방문자: 뽑힌 유저의 선호로 구경만 하고 user_id를 남기지 않는다 (로그인/장바구니/구매 없음, 상태 기록 없음)
+        anonymous = self.anonymous_ratio > 0 and self.rng.random() < self.anonymous_ratio
         
         # 세션 ID 생성 (sYYYYMMDD_8자리)
         date_str = session_start_time.strftime('%Y%m%d')
-        random_part = f"{random.randint(0, 99999999):08d}"
-        session_id = f"s{date_str}_{random_part}"
+        random_part = f"{self.rng.randint(0, 99999999):08d}"
+        session = events.start_session(
+            f"s{date_str}_{random_part}", ANONYMOUS_USER_ID if anonymous else user['user_id'],
+            is_new=not anonymous and self.user_state.session_count[user['index']] == 0,
+        )
         
-        event_logs = []
-        is_logged_in = user['initial_login_status']
-        current_time = session_start_time
-        session_context = {}
+        is_logged_in = user['initial_login_status'] and not anonymous
+        current_time = to_epoch_seconds(session_start_time)  # epoch 초 (float)
+        current_item = -1  # 선택된 책의 카탈로그 인덱스 (-1: 없음)
         event_sequence = 1
+        session_day = int(current_time // 86400)
+        purchased_flags = 0  # 이번 세션 구매로 켜질 ever_* 플래그 비트
         
         # 1. App Launch
-        event_logs.append(self._generate_event('App Launch', session_id, user['user_id'], current_time, event_sequence))
+        events.add(session, round(current_time * 1000), EVENT_APP_LAUNCH, event_sequence)
         event_sequence += 1
         
         # 2. View Main Page
         min_sec, max_sec = self.config.TIME_DELAY_SECONDS.get('default')
-        current_time += timedelta(seconds=random.uniform(min_sec, max_sec))
-        event_logs.append(self._generate_event('View Main Page', session_id, user['user_id'], current_time, event_sequence, {'is_logged_in': is_logged_in}))
+        current_time += self.rng.uniform(min_sec, max_sec)
+        events.add(session, round(current_time * 1000), EVENT_VIEW_MAIN_PAGE, event_sequence, is_logged_in)
         event_sequence += 1
         
-        current_rule_name = 'PROB_MAINPAGE_LOGIN' if is_logged_in else 'PROB_MAINPAGE_NOT_LOGIN'
+        t = self.transitions
+        rule_id = t.mainpage_rule[is_logged_in]
         
         while True:
-            prob_dict = getattr(self.config, current_rule_name)
-            chosen_action = self._get_next_action(prob_dict)
+            # 현재 규칙의 누적 확률로 행동 선택 (random.choices와 같은 방식)
+            cum_weights = t.rule_cum_weights[rule_id]
+            action_id = t.rule_actions[rule_id][
+                bisect(cum_weights, self.rng.random() * t.rule_totals[rule_id], 0, len(cum_weights) - 1)
+            ]
+            if anonymous and t.action_blocked_anonymous[action_id]:
+                action_id = t.drop_off_action  # 익명 방문자는 로그인/장바구니/구매 대신 이탈
             
-            delay_range = self.config.TIME_DELAY_SECONDS.get(current_rule_name, self.config.TIME_DELAY_SECONDS['default'])
-            delay_seconds = random.uniform(*delay_range)
-            current_time += timedelta(seconds=delay_seconds)
-            
-            event_properties = {'time_spent_sec': round(delay_seconds, 2)}
-
-            # 선택된 책 정보가 있으면 Properties에 추가
-            if 'current_book' in session_context:
-                # 책 정보가 유지되어야 하는 페이지들
-                if current_rule_name in [
-                    'PROB_VIEW_ITEM_LOGIN', 'PROB_ACTION_AFTER_ADD_TO_CART', 
-                    'PROB_ACTION_AFTER_VIEW_CART', 'PROB_PURCHASE_CLEAR',
-                    'PROB_BARO_SHOP', 'PROB_BARO_VISIT', 'PROB_BARO_PURCHASE'
-                ]:
-                    book = session_context['current_book']
-                    event_properties['item_id'] = book.get('ID', book.get('Id', None))
-                    event_properties['item_title'] = book.get('제목', None)
-                    event_properties['item_price'] = book.get('가격', None)
-                    event_properties['item_category'] = book.get('카테고리', None)
-
-                # 책 정보 컨텍스트 해제 (메인이나 리스트로 돌아갈 때)
-                if current_rule_name in ['PROB_MAINPAGE_LOGIN', 'PROB_MAINPAGE_NOT_LOGIN', 'PROB_VIEW_ITEM_LIST']:
-                    del session_context['current_book']
+            delay_seconds = self.rng.uniform(*t.rule_delays[rule_id])
+            current_time += delay_seconds
+
+            # 책 정보가 유지되어야 하는 페이지면 선택된 책을 이벤트에 포함
+            event_item = current_item if t.rule_keeps_item[rule_id] else -1
+            # 책 정보 컨텍스트 해제 (메인이나 리스트로 돌아갈 때)
+            if t.rule_resets_item[rule_id]:
+                current_item = -1
 
             # 현재 페이지 로그 기록
-            event_logs.append(self._generate_event(current_rule_name, session_id, user['user_id'], current_time, event_sequence, event_properties))
+            events.add(session, round(current_time * 1000), RULE_EVENT_BASE + rule_id, event_sequence,
+                       time_spent_sec=round(delay_seconds, 2), item=event_item)
             event_sequence += 1 
+            if event_item >= 0 and self._purchase_rule[rule_id]:
+                purchased_flags |= int(self._item_flag_bits[event_item])
             
             # Drop-off 처리
-            if chosen_action == 'drop-off':
-                current_time += timedelta(seconds=1) 
-                event_logs.append(self._generate_event('drop-off', session_id, user['user_id'], current_time, event_sequence, {}))
+            if action_id == t.drop_off_action:
+                current_time += 1
+                events.add(session, round(current_time * 1000), EVENT_DROP_OFF, event_sequence)
                 event_sequence += 1 
                 
-                if random.random() < 0.5: # 50% 확률 재접속
-                    reconnect_delay_range = self.config.TIME_DELAY_SECONDS.get('default')
-                    reconnect_delay_sec = random.uniform(*reconnect_delay_range) + 5.0
-                    current_time += timedelta(seconds=reconnect_delay_sec)
-                    event_logs.append(self._generate_event('Reconnect_Session', session_id, user['user_id'], current_time, event_sequence, {'is_logged_in': is_logged_in}))
+                if self.rng.random() < self.config.RECONNECT_PROB: # 재접속
+                    current_time += self.rng.uniform(*t.default_delay) + 5.0
+                    events.add(session, round(current_time * 1000), EVENT_RECONNECT, event_sequence, is_logged_in)
                     event_sequence += 1 
                     continue 
                 else:
                     break 
 
-            # 다음 상태 결정 로직
-            if chosen_action in ['click_item', 'item']: # 검색결과 클릭 or 추천상품 클릭
-                if not self.book_db.empty and 'purchase_weight' in self.book_db.columns:
-                    selected_book_row = self.book_db.sample(n=1, weights='purchase_weight').iloc[0]
-                    session_context['current_book'] = selected_book_row.to_dict()
-                current_rule_name = 'PROB_VIEW_ITEM_LOGIN'
-
-            elif chosen_action == 'login_success':
+            # 다음 상태 결정 (컴파일된 전이표)
+            if t.action_picks_item[action_id]: # 검색결과 클릭 or 추천상품 클릭
+                if self.catalog:
+                    current_item = self.book_sampler.sample_one(self.np_rng, user['segment'])
+            elif t.action_releases_item[action_id]:
+                current_item = -1
+            if t.action_sets_login[action_id]:
                 is_logged_in = True
-                current_rule_name = 'PROB_MAINPAGE_LOGIN'
-            elif chosen_action == 'login':
-                current_rule_name = 'PROB_ON_LOGIN_ATTEMPT'
-            elif chosen_action == 'mypage':
-                current_rule_name = 'PROB_MYPAGE_LOGIN'
-            elif chosen_action in ['search', 'search_text', 'view_recommended_item']:
-                current_rule_name = 'PROB_VIEW_ITEM_LIST'
-            elif chosen_action == 'add_to_cart':
-                current_rule_name = 'PROB_ACTION_AFTER_ADD_TO_CART'
-            elif chosen_action == 'view_cart':
-                current_rule_name = 'PROB_ACTION_AFTER_VIEW_CART'
-            elif chosen_action == 'purchase':
-                current_rule_name = 'PROB_PURCHASE_CLEAR'
-            elif chosen_action == 'buy_baro':
-                current_rule_name = 'PROB_BARO_SHOP'
-            elif chosen_action == 'choose_shop':
-                current_rule_name = 'PROB_BARO_VISIT'
-            elif chosen_action == 'choose_visit':
-                current_rule_name = 'PROB_BARO_PURCHASE'
-            elif chosen_action == 'order_detail':
-                current_rule_name = 'PROB_ORDER_DETAIL'
-            elif chosen_action == 'promotion':
-                current_rule_name = 'PROB_ACTION_AFTER_PROMOTION' 
-            elif chosen_action in ['mainpage', 'return_mainpage', 'return_item_list', 'abandon', 'recommand']:
-                if 'current_book' in session_context and chosen_action in ['return_item_list', 'return_mainpage']:
-                    del session_context['current_book']
-                current_rule_name = 'PROB_MAINPAGE_LOGIN' if is_logged_in else 'PROB_MAINPAGE_NOT_LOGIN'
-            else:
-                print(f"⚠️ 경고: 알 수 없는 chosen_action '{chosen_action}'. 세션을 종료합니다.")
-                break
-                
-        return event_logs
+            rule_id = t.next_rule[action_id][is_logged_in]
+
+        if not anonymous:
+            self.user_state.record_session(user['index'], session_day, purchased_flags)
 
 # ----------------------------------------------------
 # 3. 메인 실행 코드
@@ -341,25 +680,34 @@ if __name__ == '__main__':
         book_db = pd.DataFrame() 
         
     # 생성기 실행
-    generator = SyntheticDataGenerator(config, book_db, test_input, user_pool_path='user_pool.csv') 
-    generated_data = generator.generate_sessions()
-
-    # 결과 저장
-    print("\n--- 생성된 전체 세션 데이터 처리 중 ---")
-    
-    log_df = pd.DataFrame(generated_data)
-    if 'properties' in log_df.columns and not log_df['properties'].isnull().all():
-        properties_df = pd.json_normalize(log_df['properties'])
-        log_df = pd.concat([log_df.drop('properties', axis=1), properties_df], axis=1)
+    try:
+        generator = SyntheticDataGenerator(config, book_db, test_input, user_pool_path='user_pool.csv')
+    except FileNotFoundError as e:
+        print(f"⚠️ {e} 종료합니다.")
+        sys.exit(1)
 
-    log_df_sorted = log_df.sort_values(by=['user_id', 'timestamp'])
-    OUTPUT_LOG_FILE = 'synthetic_event_logs_by_user.xlsx'
-    
+    # 결과 저장: 날짜별로 파티션된 Parquet (pyarrow가 없으면 CSV), 각 파일 안은 user_id → timestamp 순서
+    OUTPUT_LOG_DIR = 'synthetic_event_logs_by_user'
     try:
-        log_df_sorted.to_excel(OUTPUT_LOG_FILE, sheet_name='User_Event_Logs', index=False)
-        print(f"✅ 저장 완료! '{OUTPUT_LOG_FILE}' (총 {len(log_df_sorted)}개 로그)")
-    except Exception as e:
-        print(f"\n❌ 저장 중 오류 발생: {e} (openpyxl 설치 여부를 확인하세요)")
+        sink = PartitionedParquetSink(OUTPUT_LOG_DIR)
+    except ImportError:
+        print("⚠️ pyarrow가 설치되어 있지 않아 CSV로 저장합니다.")
+        sink = CsvSink(f"{OUTPUT_LOG_DIR}.csv")
+    sink = UserSortedSink(sink, generator.max_user_id())
+
+    # 세션 요약은 이벤트와 같은 블록에서 바로 집계 (이벤트 로그를 다시 읽지 않음)
+    summary = SessionSummarizer(generator, path='synthetic_session_summary.csv')
+
+    preview = []
+    with sink, summary:
+        for events in generator.iter_session_events():
+            if len(preview) < 5:
+                preview.extend(events.head(5 - len(preview)).to_events())
+            sink.write_buffer(events)
+            summary.add(events)
+    print(f"✅ 저장 완료! '{sink.path}' (총 {sink.rows_written}개 로그)")
+    summary.write_rollups('synthetic_session_rollups')
+    print(f"✅ 세션 요약 저장 완료! '{summary.path}' (총 {summary.sessions_written}개 세션), 일/주별 롤업: 'synthetic_session_rollups'")
         
     print("\n--- 콘솔 JSON 출력 (상위 5개) ---")
-    print(json.dumps(generated_data[:5], indent=2, ensure_ascii=False, default=convert_to_python_native))
\ No newline at end of file
+    print(json.dumps(preview, indent=2, ensure_ascii=False, default=convert_to_python_native))
@@ -0,0 +1,237 @@
+from datetime import datetime
+
+import numpy as np
+
+from event_buffer import (
+    EVENT_APP_LAUNCH, EVENT_DROP_OFF, EVENT_RECONNECT, EVENT_VIEW_MAIN_PAGE, RULE_EVENT_BASE, EventBuffer,
+    event_names_for,
+)
+from user_state import ANONYMOUS_USER_ID
+
+# ----------------------------------------------------
+# 배치(벡터) 세션 시뮬레이션 엔진
+# ----------------------------------------------------
+EPOCH = datetime(1970, 1, 1)
+
+
+class BatchSessionEngine:
+    """
+    여러 세션을 NumPy 배열로 한꺼번에 진행시키는 엔진.
+
+    세션마다 현재 규칙, 로그인 여부, 현재 시각(epoch 초), 이벤트 순번, 선택된 책을 배열로 들고
+    매 스텝마다 살아있는 모든 세션의 다음 행동과 체류 시간을 한 번에 뽑는다.
+    종료(drop-off 후 재접속 안 함)된 세션은 살아있는 목록에서 빠진다.
+    출력 스키마는 scalar 경로(_create_one_session)와 같다.
+
+    유저 상태(ever_* 플래그)는 블록이 끝날 때 저장소에 반영하지만, 책을 고를 때는 같은 블록에서
+    먼저 시작한 같은 유저 세션의 구매로 켜진 비트도 세그먼트에 더한다(_BlockFlags).
+    세션들이 한 스텝씩 함께 진행되므로 먼저 시작한 세션이 아직 구매하지 않은 스텝에서는
+    반영되지 않는다는 점만 세션을 차례로 끝까지 돌리는 scalar 엔진과 다르다.
+    """
+
+    def __init__(self, generator):
+        self.generator = generator
+        self.config = generator.config
+        self.t = generator.transitions
+        self.rng = generator.np_rng
+
+        login_ratio = self.config.USER_INITIAL_LOGIN_RATIO
+        self.login_prob = login_ratio.get('login', 0) / sum(login_ratio.values())
+
+        # 책 샘플러(유저 세그먼트별 카테고리 선호) + 이벤트에 쓰는 책 필드 배열 (생성기와 공유)
+        self.catalog = generator.catalog
+        self.book_sampler = generator.book_sampler
+
+    def run(self, session_start_times):
+        """
+        session_start_times(epoch 초, float 배열)마다 세션 1개씩 시뮬레이션하고
+        세션 순서 → event_sequence 순서로 정렬된 EventBuffer를 반환
+        """
+        t = self.t
+        rng = self.rng
+        start_times = np.asarray(session_start_times, dtype=np.float64)
+        n = len(start_times)
+        if n == 0:
+            return self._materialize(_EventColumns().finish(), self.generator._user_ids[:0], [], np.zeros(0, dtype=bool))
+
+        generator = self.generator
+        users = generator.sample_user_indices(n)
+        segments = generator.user_segments(users)
+        logged_in = rng.random(n) < self.login_prob
+        # 익명 방문자: 뽑힌 유저의 선호로 구경만 하고 user_id를 남기지 않는다 (로그인/장바구니/구매 없음)
+        anonymous = rng.random(n) < generator.anonymous_ratio if generator.anonymous_ratio > 0 else np.zeros(n, dtype=bool)
+        logged_in &= ~anonymous
+        session_ids = self._make_session_ids(start_times)
+        purchased_flags = np.zeros(n, dtype=np.uint8)  # 세션별 구매로 켜질 ever_* 플래그 비트
+        block_flags = _BlockFlags(users, start_times, len(generator.user_state.flag_names))
+        is_purchase_rule = np.array(generator._purchase_rule)
+
+        current_time = start_times.copy()
+        sequence = np.ones(n, dtype=np.int32)
+        book = np.full(n, -1, dtype=np.int64)
+        events = _EventColumns()
+
+        # 1. App Launch / 2. View Main Page
+        all_sessions = np.arange(n)
+        events.add(all_sessions, sequence, current_time, EVENT_APP_LAUNCH)
+        sequence += 1
+        low, high = t.default_delay
+        current_time += low + (high - low) * rng.random(n)
+        events.add(all_sessions, sequence, current_time, EVENT_VIEW_MAIN_PAGE, logged_in=logged_in)
+        sequence += 1
+
+        rule = np.where(logged_in, t.mainpage_rule[1], t.mainpage_rule[0]).astype(np.int16)
+        keeps_item = np.array(t.rule_keeps_item)
+        resets_item = np.array(t.rule_resets_item)
+        picks_item = np.array(t.action_picks_item)
+        releases_item = np.array(t.action_releases_item)
+        sets_login = np.array(t.action_sets_login)
+        blocked_anonymous = np.array(t.action_blocked_anonymous)
+
+        alive = all_sessions
+        while len(alive):
+            r = rule[alive]
+            u = rng.random(len(alive))
+            local = (u[:, None] >= t.cum_matrix[r]).sum(axis=1)
+            action = t.action_matrix[r, local]
+            action = np.where(anonymous[alive] & blocked_anonymous[action], t.drop_off_action, action)  # 익명은 로그인/구매 대신 이탈
+
+            delay = t.delay_low[r] + (t.delay_high[r] - t.delay_low[r]) * rng.random(len(alive))
+            current_time[alive] += delay
+
+            # 현재 페이지 이벤트 (책 정보 유지 페이지면 책 포함), 리셋 페이지면 책 해제
+            session_book = book[alive]
+            event_book = np.where(keeps_item[r], session_book, -1)
+            events.add(alive, sequence[alive], current_time[alive], RULE_EVENT_BASE + r,
+                       time_spent=np.round(delay, 2), book=event_book)
+            sequence[alive] += 1
+            book[alive[resets_item[r] & (session_book >= 0)]] = -1
+            bought = is_purchase_rule[r] & (event_book >= 0)
+            if bought.any():
+                purchased_flags[alive[bought]] |= generator._item_flag_bits[event_book[bought]]
+                buyers = alive[bought & ~anonymous[alive]]
+                block_flags.add(buyers, purchased_flags[buyers])
+
+            # Drop-off 처리: 재접속하는 세션은 같은 규칙에서 계속, 나머지는 종료
+            dropped_mask = action == t.drop_off_action
+            dropped = alive[dropped_mask]
+            keep_mask = ~dropped_mask
+            if len(dropped):
+                current_time[dropped] += 1
+                events.add(dropped, sequence[dropped], current_time[dropped], EVENT_DROP_OFF)
+                sequence[dropped] += 1
+
+                reconnect_mask = rng.random(len(dropped)) < self.config.RECONNECT_PROB
+                reconnected = dropped[reconnect_mask]
+                current_time[reconnected] += low + (high - low) * rng.random(len(reconnected)) + 5.0
+                events.add(reconnected, sequence[reconnected], current_time[reconnected], EVENT_RECONNECT,
+                           logged_in=logged_in[reconnected])
+                sequence[reconnected] += 1
+                keep_mask[dropped_mask] = reconnect_mask
+
+            # 다음 상태 결정
+            moving = alive[~dropped_mask]
+            moving_action = action[~dropped_mask]
+            pick = moving[picks_item[moving_action]]
+            if len(pick) and self.catalog:
+                book[pick] = self.book_sampler.sample(rng, segments[pick] | block_flags.earned(pick))
+            book[moving[releases_item[moving_action]]] = -1
+            logged_in[moving[sets_login[moving_action]]] = True
+            rule[moving] = t.next_rule_array[moving_action, logged_in[moving].astype(np.intp)]
+
+            alive = alive[keep_mask]
+
+        # 신규 유저 세션: 블록 시작 시 세션 수가 0인 유저의 (익명이 아닌) 첫 세션
+        known = ~anonymous
+        known_sessions = np.flatnonzero(known)
+        _, first_index = np.unique(users[known_sessions], return_index=True)
+        first_sessions = known_sessions[first_index]
+        session_is_new = np.zeros(n, dtype=bool)
+        session_is_new[first_sessions] = generator.user_state.session_count[users[first_sessions]] == 0
+        generator.user_state.record_sessions(
+            users[known], np.floor(start_times[known] / 86400).astype(np.int64), purchased_flags[known]
+        )
+        user_ids = generator._user_ids[users]
+        if anonymous.any():
+            user_ids = np.where(anonymous, ANONYMOUS_USER_ID, user_ids)
+        return self._materialize(events.finish(), user_ids, session_ids, session_is_new)
+
+    def _make_session_ids(self, start_times):
+        """세션 ID (sYYYYMMDD_8자리)"""
+        days = np.floor(start_times / 86400).astype('datetime64[D]')
+        date_strs = np.char.replace(np.datetime_as_string(days, unit='D'), '-', '')
+        random_parts = self.rng.integers(0, 100000000, size=len(start_times))
+        return [f"s{d}_{r:08d}" for d, r in zip(date_strs.tolist(), random_parts.tolist())]
+
+    def _materialize(self, columns, user_ids, session_ids, session_is_new):
+        """세션 → event_sequence 순서로 정렬한 EventBuffer (문자열 변환은 sink에서)"""
+        order = np.lexsort((columns['sequence'], columns['session']))
+        return EventBuffer(
+            event_names_for(self.t), self.catalog, session_ids, user_ids,
+            columns['session'][order].astype(np.int32),
+            np.round(columns['time'][order] * 1000).astype(np.int64),
+            columns['code'][order],
+            columns['sequence'][order],
+            columns['logged_in'][order],
+            columns['time_spent'][order],
+            columns['book'][order],
+            session_is_new=session_is_new,
+        )
+
+
+class _BlockFlags:
+    """
+    블록 안에서 구매로 켜진 ever_* 비트를 유저별로 모아두는 표.
+    비트마다 그 비트를 켠 세션 중 가장 이른 시작 시각을 기록하고,
+    그보다 늦게 시작한 같은 유저의 세션에만 비트를 돌려준다 (scalar 엔진의 세션 순서와 같게).
+    """
+
+    def __init__(self, users, start_times, n_bits):
+        self.start_times = start_times
+        _, self.user_slot = np.unique(users, return_inverse=True)
+        self.first_start = np.full((self.user_slot.max() + 1, n_bits), np.inf)
+        self.bit_values = (1 << np.arange(n_bits)).astype(np.uint8)
+
+    def add(self, sessions, flag_bits):
+        for bit, value in enumerate(self.bit_values):
+            has_bit = sessions[(flag_bits & value) != 0]
+            np.minimum.at(self.first_start[:, bit], self.user_slot[has_bit], self.start_times[has_bit])
+
+    def earned(self, sessions):
+        earlier = self.first_start[self.user_slot[sessions]] < self.start_times[sessions, None]
+        return np.bitwise_or.reduce(np.where(earlier, self.bit_values, 0).astype(np.uint8), axis=1)
+
+
+class _EventColumns:
+    """스텝마다 나오는 이벤트 배열 조각을 모아두는 버퍼"""
+
+    DTYPES = {
+        'session': np.int64, 'sequence': np.int32, 'time': np.float64, 'code': np.int16,
+        'time_spent': np.float64, 'logged_in': np.int8, 'book': np.int64,
+    }
+
+    def __init__(self):
+        self.parts = {name: [] for name in self.DTYPES}
+
+    def add(self, sessions, sequence, times, code, time_spent=None, logged_in=None, book=None):
+        k = len(sessions)
+        if k == 0:
+            return
+        self.parts['session'].append(np.asarray(sessions, dtype=np.int64))
+        self.parts['sequence'].append(np.array(sequence, dtype=np.int32))
+        self.parts['time'].append(np.array(times, dtype=np.float64))
+        self.parts['code'].append(np.broadcast_to(np.asarray(code, dtype=np.int16), (k,)))
+        self.parts['time_spent'].append(np.full(k, np.nan) if time_spent is None else time_spent)
+        self.parts['logged_in'].append(np.full(k, -1, dtype=np.int8) if logged_in is None else logged_in.astype(np.int8))
+        self.parts['book'].append(np.full(k, -1, dtype=np.int64) if book is None else book)
+
+    def finish(self):
+        return {
+            name: np.concatenate(parts) if parts else np.empty(0, dtype=self.DTYPES[name])
+            for name, parts in self.parts.items()
+        }
+
+
+def to_epoch_seconds(dt):
+    """naive datetime → epoch 초 (float)"""
+    return (dt - EPOCH).total_seconds()
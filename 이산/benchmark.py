@@ -0,0 +1,412 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import user_pool
+from a import Config, SyntheticDataGenerator
+
+# ----------------------------------------------------
+# 1. 벤치마크용 합성 픽스처
+# ----------------------------------------------------
+def make_user_pool_fixture(n_users, seed=0):
+    """user_pool.csv와 같은 스키마의 합성 유저 풀 DataFrame (벤치마크 전용)"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'user_id': np.arange(1, n_users + 1),
+        'gender': rng.choice(['여성', '남성', '기타'], size=n_users, p=[0.49, 0.49, 0.02]),
+        'age': rng.integers(0, 100, size=n_users),
+    })
+
+
+def make_book_db_fixture(n_books, seed=0):
+    """biblio_data_with_weights.csv에서 이벤트가 사용하는 컬럼만 가진 합성 서적 DB"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'ID': [f"NBC{i:011d}" for i in range(n_books)],
+        '제목': [f"도서 {i}" for i in range(n_books)],
+        '가격': rng.integers(5000, 50000, size=n_books),
+        '카테고리': rng.choice(['외국어', '소설/문학', 'IT/컴퓨터', '어린이'], size=n_books),
+        'purchase_weight': rng.choice([1, 1, 1, 5, 50], size=n_books),
+    })
+
+
+def build_generator(pool_df, book_db, total_sessions, workdir, seed=0, end_date='2024-12-31'):
+    pool_path = os.path.join(workdir, f"user_pool_{len(pool_df)}_{seed}.csv")
+    if not os.path.exists(pool_path):
+        pool_df.to_csv(pool_path, index=False)
+    input_data = {
+        'total_sessions': total_sessions,
+        'start_date': '2024-01-01',
+        'end_date': end_date,
+        'seed': seed,
+    }
+    return SyntheticDataGenerator(Config(), book_db, input_data, user_pool_path=pool_path)
+
+# ----------------------------------------------------
+# 2. 유저 샘플링 / 세션 생성 처리량
+# ----------------------------------------------------
+def bench_user_sampling(pool_sizes, n_sessions, n_legacy_draws, workdir):
+    """풀 크기별 유저 선택 및 세션 생성 처리량(sessions/sec) 측정"""
+    book_db = make_book_db_fixture(2821)
+    rows = []
+    for n_users in pool_sizes:
+        random.seed(0)
+        generator = build_generator(make_user_pool_fixture(n_users), book_db, n_sessions, workdir)
+
+        # 기존 방식: 세션마다 DataFrame.sample(weights=...) 호출
+        start = time.perf_counter()
+        for _ in range(n_legacy_draws):
+            generator.sampled_user_pool.sample(n=1, weights=generator.session_weights).iloc[0]
+        legacy_rate = n_legacy_draws / (time.perf_counter() - start)
+
+        # 새 방식: 미리 만든 누적 가중치 샘플러
+        start = time.perf_counter()
+        for _ in range(n_sessions):
+            generator._get_random_user()
+        picker_rate = n_sessions / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for _ in generator.iter_session_events():
+            pass
+        session_rate = n_sessions / (time.perf_counter() - start)
+
+        generator.engine = 'batch'
+        start = time.perf_counter()
+        for _ in generator.iter_session_events():
+            pass
+        batch_session_rate = n_sessions / (time.perf_counter() - start)
+
+        rows.append({
+            'pool_size': n_users,
+            'startup_sec': round(generator.startup_seconds, 3),
+            'legacy_user_picks_per_sec': round(legacy_rate, 1),
+            'user_picks_per_sec': round(picker_rate, 1),
+            'sessions_per_sec': round(session_rate, 1),
+            'batch_sessions_per_sec': round(batch_session_rate, 1),
+        })
+    return pd.DataFrame(rows)
+
+# ----------------------------------------------------
+# 3. 출력 형식별 쓰기 시간 / 파일 크기
+# ----------------------------------------------------
+EXCEL_MAX_ROWS = 1048575  # 시트당 최대 행 수 (헤더 제외)
+
+
+def _legacy_log_frame(events):
+    """기존 __main__ 방식: DataFrame + json_normalize + concat"""
+    log_df = pd.DataFrame(events)
+    properties_df = pd.json_normalize(log_df['properties'])
+    return pd.concat([log_df.drop('properties', axis=1), properties_df], axis=1)
+
+
+def _path_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+def bench_output_formats(n_sessions, workdir, formats=None):
+    """같은 이벤트 집합을 형식별로 기록하는 데 걸린 시간과 결과 크기 측정"""
+    from sinks import open_sink
+
+    # 날짜 파티션이 비어 보이지 않도록 1주일 범위로 생성
+    generator = build_generator(
+        make_user_pool_fixture(100_000), make_book_db_fixture(2821), n_sessions, workdir, end_date='2024-01-08'
+    )
+    generator.engine = 'batch'
+    buffers = list(generator.iter_session_events())
+    events = [event for buffer in buffers for event in buffer.to_events()]
+
+    writers = {
+        'xlsx (legacy)': lambda path: _legacy_log_frame(events[:EXCEL_MAX_ROWS]).to_excel(path, index=False),
+        'csv (legacy)': lambda path: _legacy_log_frame(events).to_csv(path, index=False),
+    }
+    for output_format in ('csv', 'jsonl', 'parquet', 'parquet_partitioned'):
+        def write(path, output_format=output_format):
+            with open_sink(output_format, path) as sink:
+                for buffer in buffers:
+                    sink.write_buffer(buffer)
+        writers[output_format] = write
+
+    rows = []
+    for name, write in writers.items():
+        if formats and name.split(' ')[0] not in formats:
+            continue
+        path = os.path.join(workdir, f"bench_output_{name.split(' ')[0]}")
+        if name.startswith('xlsx'):
+            path += '.xlsx'
+        try:
+            start = time.perf_counter()
+            write(path)
+            elapsed = time.perf_counter() - start
+        except ImportError as e:
+            print(f"⚠️ {name}: 건너뜀 ({e})")
+            continue
+        n_rows = min(len(events), EXCEL_MAX_ROWS) if name.startswith('xlsx') else len(events)
+        rows.append({
+            'format': name,
+            'rows': n_rows,
+            'write_sec': round(elapsed, 3),
+            'rows_per_sec': round(n_rows / elapsed, 1),
+            'size_mb': round(_path_size(path) / 1e6, 2),
+        })
+    return pd.DataFrame(rows)
+
+# ----------------------------------------------------
+# 4. 이벤트 표현별 메모리 사용량
+# ----------------------------------------------------
+def bench_event_memory(n_sessions, workdir):
+    """
+    같은 세션을 EventBuffer(struct-of-arrays)와 기존 이벤트 dict 목록으로 보관할 때
+    tracemalloc으로 잰 이벤트당 바이트 수 비교 (engine별)
+    """
+    import tracemalloc
+
+    rows = []
+    for engine in ('scalar', 'batch'):
+        generator = build_generator(make_user_pool_fixture(100_000), make_book_db_fixture(2821), n_sessions, workdir)
+        generator.engine = engine
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        buffers = list(generator.iter_session_events())
+        buffer_sec = time.perf_counter() - start
+        buffer_bytes, buffer_peak = tracemalloc.get_traced_memory()
+
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        events = [event for buffer in buffers for event in buffer.to_events()]
+        dict_sec = time.perf_counter() - start
+        dict_bytes = tracemalloc.get_traced_memory()[0] - buffer_bytes
+        tracemalloc.stop()
+
+        n_events = len(events)
+        rows.append({
+            'engine': engine,
+            'events': n_events,
+            'buffer_bytes_per_event': round(buffer_bytes / n_events, 1),
+            'buffer_peak_bytes_per_event': round(buffer_peak / n_events, 1),
+            'dict_bytes_per_event': round(dict_bytes / n_events, 1),
+            'buffer_sec': round(buffer_sec, 3),
+            'to_dicts_sec': round(dict_sec, 3),
+        })
+        del buffers, events
+    return pd.DataFrame(rows)
+
+# ----------------------------------------------------
+# 5. 사용자 풀 생성 시간
+# ----------------------------------------------------
+def bench_pool_build(pool_sizes, legacy_users, seed=0):
+    """
+    build_user_pool(벡터화) 생성 시간/메모리와 기존 create_new_user_for_pool 반복의 처리량 비교.
+    기존 방식은 풀 크기와 관계없이 유저당 비용이 같으므로 min(풀 크기, legacy_users)명만 만들어 잰다.
+    """
+    config = user_pool.Config()
+    rows = []
+    for n_users in pool_sizes:
+        start = time.perf_counter()
+        pool_df = user_pool.build_user_pool(config, n_users, seed=seed)
+        build_sec = time.perf_counter() - start
+        memory_mb = pool_df.memory_usage(deep=True).sum() / 1e6
+        del pool_df
+
+        n_legacy = min(n_users, legacy_users)
+        legacy_rate = None
+        if n_legacy:
+            random.seed(seed)
+            start = time.perf_counter()
+            for user_sequence in range(1, n_legacy + 1):
+                user_pool.create_new_user_for_pool(config, user_sequence)
+            legacy_rate = n_legacy / (time.perf_counter() - start)
+
+        rows.append({
+            'pool_size': n_users,
+            'build_sec': round(build_sec, 3),
+            'users_per_sec': round(n_users / build_sec, 1),
+            'memory_mb': round(memory_mb, 1),
+            'legacy_users_per_sec': None if legacy_rate is None else round(legacy_rate, 1),
+        })
+    return pd.DataFrame(rows)
+
+# ----------------------------------------------------
+# 6. 풀 크기 × 카탈로그 크기별 세션 생성 처리량
+# ----------------------------------------------------
+def bench_generation(pool_sizes, catalog_sizes, n_sessions, workdir, engines=('scalar', 'batch')):
+    """엔진 / 풀 크기 / 카탈로그 크기 조합마다 세션 생성(EventBuffer까지) 처리량 측정"""
+    rows = []
+    for n_books in catalog_sizes:
+        book_db = make_book_db_fixture(n_books)
+        for n_users in pool_sizes:
+            pool_df = make_user_pool_fixture(n_users)
+            for engine in engines:
+                generator = build_generator(pool_df, book_db, n_sessions, workdir)
+                generator.engine = engine
+                n_events = 0
+                start = time.perf_counter()
+                for buffer in generator.iter_session_events():
+                    n_events += len(buffer)
+                elapsed = time.perf_counter() - start
+                rows.append({
+                    'engine': engine,
+                    'pool_size': n_users,
+                    'catalog_size': n_books,
+                    'startup_sec': round(generator.startup_seconds, 3),
+                    'sessions_per_sec': round(n_sessions / elapsed, 1),
+                    'events_per_sec': round(n_events / elapsed, 1),
+                })
+    return pd.DataFrame(rows)
+
+# ----------------------------------------------------
+# 7. 결과 저장 / 기준선 비교
+# ----------------------------------------------------
+# 결과 표에서 행을 식별하는 컬럼 (기준선과 같은 행끼리 비교)
+SUITE_KEYS = {
+    'pool_build': ['pool_size'],
+    'user_sampling': ['pool_size'],
+    'generation': ['engine', 'pool_size', 'catalog_size'],
+    'output_formats': ['format'],
+    'event_memory': ['engine'],
+}
+
+
+def metric_direction(column):
+    """값이 클수록 좋으면 1, 작을수록 좋으면 -1, 비교하지 않는 컬럼이면 0"""
+    if column.endswith('_per_sec'):
+        return 1
+    if column.endswith('_sec') or column.endswith('_mb') or column.endswith('_per_event'):
+        return -1
+    return 0
+
+
+def environment_info():
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def save_results(path, results, args):
+    """스위트별 결과 표를 JSON으로 저장 ({'environment', 'args', 'results': {스위트: [행, ...]}})"""
+    document = {
+        'environment': environment_info(),
+        'args': args,
+        'results': {suite: json.loads(df.to_json(orient='records')) for suite, df in results.items()},
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, ensure_ascii=False, indent=2)
+
+
+def compare_to_baseline(results, baseline_path, tolerance):
+    """
+    기준선 JSON과 같은 행(SUITE_KEYS)끼리 성능 컬럼을 비교한 표를 반환.
+    ratio는 현재/기준선 값이고, 나빠진 방향으로 tolerance(비율)보다 크게 변하면 regression=True.
+    """
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+
+    rows = []
+    for suite, df in results.items():
+        if suite not in baseline or df.empty:
+            continue
+        keys = SUITE_KEYS[suite]
+        base_df = pd.DataFrame(baseline[suite])
+        if base_df.empty or not set(keys) <= set(base_df.columns):
+            continue
+        merged = df.merge(base_df, on=keys, suffixes=('', '_baseline'))
+        for column in df.columns:
+            direction = metric_direction(column)
+            if not direction or f"{column}_baseline" not in merged.columns:
+                continue
+            for _, row in merged.iterrows():
+                current, base = row[column], row[f"{column}_baseline"]
+                if pd.isna(current) or pd.isna(base) or base == 0:
+                    continue
+                ratio = current / base
+                change = (ratio - 1) * direction  # 양수면 개선, 음수면 악화
+                rows.append({
+                    'suite': suite,
+                    'row': ', '.join(f"{key}={row[key]}" for key in keys),
+                    'metric': column,
+                    'baseline': base,
+                    'current': current,
+                    'ratio': round(ratio, 3),
+                    'regression': bool(change < -tolerance),
+                })
+    return pd.DataFrame(rows, columns=['suite', 'row', 'metric', 'baseline', 'current', 'ratio', 'regression'])
+
+# ----------------------------------------------------
+# 8. 메인 실행 코드
+# ----------------------------------------------------
+SUITES = ['pool_build', 'user_sampling', 'generation', 'output_formats', 'event_memory']
+SUITE_TITLES = {
+    'pool_build': '사용자 풀 생성 (build_user_pool / create_new_user_for_pool)',
+    'user_sampling': '유저 샘플링 / 세션 생성 처리량',
+    'generation': '풀 × 카탈로그 크기별 세션 생성 처리량',
+    'output_formats': '출력 형식별 쓰기 시간 / 크기',
+    'event_memory': '이벤트 표현별 메모리 (tracemalloc)',
+}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="합성 데이터 생성기 벤치마크 (고정 시드 + 합성 픽스처, 오프라인/CPU 전용)"
+    )
+    parser.add_argument('--suites', nargs='+', choices=SUITES, default=SUITES, help="실행할 벤치마크 (기본: 전체)")
+    parser.add_argument('--build-sizes', type=int, nargs='+', default=[100_000, 1_000_000, 10_000_000],
+                        help="사용자 풀 생성 벤치마크 풀 크기")
+    parser.add_argument('--legacy-users', type=int, default=100_000,
+                        help="create_new_user_for_pool로 만들어 볼 최대 유저 수 (0이면 생략)")
+    parser.add_argument('--pool-sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--catalog-sizes', type=int, nargs='+', default=[2821, 100_000, 1_000_000])
+    parser.add_argument('--sessions', type=int, default=20_000)
+    parser.add_argument('--legacy-draws', type=int, default=200)
+    parser.add_argument('--output-sessions', type=int, default=20_000, help="출력 형식 벤치마크 세션 수")
+    parser.add_argument('--memory-sessions', type=int, default=20_000, help="이벤트 메모리 벤치마크 세션 수")
+    parser.add_argument('--json', help="결과를 저장할 JSON 경로")
+    parser.add_argument('--baseline', help="비교할 기준선 JSON 경로 (--json으로 저장한 파일)")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="기준선 대비 허용 악화 비율 (기본 0.2 = 20%%, 넘으면 종료 코드 1)")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for suite in args.suites:
+            if suite == 'pool_build':
+                result = bench_pool_build(args.build_sizes, args.legacy_users)
+            elif suite == 'user_sampling':
+                result = bench_user_sampling(args.pool_sizes, args.sessions, args.legacy_draws, workdir)
+            elif suite == 'generation':
+                result = bench_generation(args.pool_sizes, args.catalog_sizes, args.sessions, workdir)
+            elif suite == 'output_formats':
+                result = bench_output_formats(args.output_sessions, workdir)
+            else:
+                result = bench_event_memory(args.memory_sessions, workdir)
+            results[suite] = result
+            print(f"\n--- {SUITE_TITLES[suite]} ---")
+            print(result.to_string(index=False))
+
+    if args.json:
+        save_results(args.json, results, vars(args))
+        print(f"\n💾 결과 저장: '{args.json}'")
+
+    if args.baseline:
+        comparison = compare_to_baseline(results, args.baseline, args.tolerance)
+        print(f"\n--- 기준선 비교 ('{args.baseline}', 허용 악화 {args.tolerance:.0%}) ---")
+        print(comparison.to_string(index=False) if not comparison.empty else "비교할 공통 항목이 없습니다.")
+        regressions = comparison[comparison['regression']]
+        if not regressions.empty:
+            print(f"⚠️ 성능 저하 {len(regressions)}건")
+            sys.exit(1)
+        print("✅ 기준선 대비 성능 저하 없음")
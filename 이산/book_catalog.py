@@ -0,0 +1,223 @@
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from sampler import WeightedSampler
+
+# ----------------------------------------------------
+# 서적 카탈로그 인덱스
+# ----------------------------------------------------
+# 이벤트 properties 이름 → 서적 DB 컬럼 후보
+ITEM_FIELDS = {
+    'item_id': ('ID', 'Id'),
+    'item_title': ('제목',),
+    'item_price': ('가격',),
+    'item_category': ('카테고리',),
+}
+
+
+class BookCatalog:
+    """
+    서적 DB에서 이벤트가 실제로 쓰는 필드(ID, 제목, 가격, 카테고리)만 병렬 배열로 보관하고,
+    purchase_weight 누적 분포 샘플러를 한 번만 만들어 두는 인덱스.
+
+    세션은 책을 dict 대신 정수 인덱스로 들고 다니고(책 선택은 SegmentBookSampler가 이 카탈로그의
+    샘플러/카테고리 코드로 한다), 이벤트 블록을 sink에 넘길 때 item_columns(indices)로 필드 값을 한 번에 꺼낸다.
+    책 1권 추출은 O(log N)이라 수백만 권 카탈로그에도 쓸 수 있다.
+    카테고리는 정수 코드(category_codes) + 범주 목록(categories)으로 저장한다.
+    """
+
+    def __init__(self, ids, titles, prices, category_codes, categories, sampler):
+        self.ids = ids
+        self.titles = titles
+        self.prices = prices
+        self.category_codes = category_codes
+        self.categories = categories
+        self.sampler = sampler
+
+    @classmethod
+    def from_book_db(cls, book_db):
+        """서적 DataFrame(biblio_data_with_weights.csv)으로 카탈로그 구성. 비어 있으면 빈 카탈로그"""
+        if book_db is None or book_db.empty or 'purchase_weight' not in book_db.columns:
+            return cls.empty()
+
+        def field(prop):
+            for column in ITEM_FIELDS[prop]:
+                if column in book_db.columns:
+                    return book_db[column].to_numpy()
+            return None
+
+        categories_column = field('item_category')
+        if categories_column is not None:
+            category_codes, categories = pd.factorize(categories_column, use_na_sentinel=False)
+            category_codes = category_codes.astype(np.int32)
+            categories = [None if pd.isna(c) else str(c) for c in categories]
+        else:
+            category_codes, categories = None, None
+        return cls(
+            field('item_id'),
+            field('item_title'),
+            field('item_price'),
+            category_codes,
+            categories,
+            WeightedSampler(book_db['purchase_weight'].to_numpy()),
+        )
+
+    @classmethod
+    def empty(cls):
+        return cls(None, None, None, None, None, None)
+
+    def __len__(self):
+        return 0 if self.sampler is None else len(self.sampler)
+
+    def __bool__(self):
+        return self.sampler is not None
+
+    def sample(self, rng, k):
+        """purchase_weight에 따라 책 인덱스 k개 추출"""
+        return self.sampler.sample(rng, k)
+
+    def sample_one(self, rng):
+        return self.sampler.sample_one(rng)
+
+    def item_columns(self, indices):
+        """책 인덱스 배열 → properties 컬럼별 값 리스트 (EventBuffer.to_columns용)"""
+        columns = {}
+        for prop, values in (('item_id', self.ids), ('item_title', self.titles), ('item_price', self.prices)):
+            columns[prop] = [None] * len(indices) if values is None else np.asarray(values)[indices].tolist()
+        if self.category_codes is None:
+            columns['item_category'] = [None] * len(indices)
+        else:
+            categories = self.categories
+            columns['item_category'] = [categories[c] for c in np.asarray(self.category_codes)[indices].tolist()]
+        return columns
+
+    def arrays(self):
+        """공유 메모리/메모리 매핑으로 내보낼 배열 (None인 필드는 제외)"""
+        arrays = {
+            'book_ids': self.ids, 'book_titles': self.titles, 'book_prices': self.prices,
+            'book_category_codes': self.category_codes,
+            'book_cumulative': None if self.sampler is None else self.sampler.cumulative,
+        }
+        return {name: values for name, values in arrays.items() if values is not None}
+
+    @classmethod
+    def from_arrays(cls, arrays, categories):
+        """arrays()로 내보낸 (메모리 매핑된) 배열로 카탈로그 복원"""
+        cumulative = arrays.get('book_cumulative')
+        return cls(
+            arrays.get('book_ids'),
+            arrays.get('book_titles'),
+            arrays.get('book_prices'),
+            arrays.get('book_category_codes'),
+            categories,
+            None if cumulative is None else WeightedSampler.from_cumulative(cumulative),
+        )
+
+
+# ----------------------------------------------------
+# 유저 세그먼트별 카테고리 선호 샘플러
+# ----------------------------------------------------
+class SegmentBookSampler:
+    """
+    유저 세그먼트(나이대 × 성별 × ever_* 플래그)에 따라 카테고리 가중치를 바꿔 책을 뽑는 2단계 샘플러.
+
+        1단계: 세그먼트의 카테고리 분포 = 카테고리별 purchase_weight 합 × Config의 선호 배수
+        2단계: 고른 카테고리 안에서 purchase_weight 샘플러로 책 선택
+
+    카테고리 내부 샘플러는 카테고리 수만큼만 미리 만들고, 세그먼트별 카테고리 누적 분포는
+    처음 쓰일 때 계산해 크기 제한 LRU 캐시(OrderedDict)에 둔다. 한 번의 추출 비용은
+    O(log 카테고리 수 + log 카테고리 내 책 수)이며, 배수가 모두 1이면 전역 purchase_weight 분포와 같다.
+    카탈로그에 카테고리가 없으면 전역 분포(BookCatalog.sample)를 그대로 쓴다.
+    """
+
+    def __init__(self, catalog, config, gender_categories):
+        self.catalog = catalog
+        self.enabled = bool(catalog) and catalog.category_codes is not None
+        self.cache_size = config.SEGMENT_SAMPLER_CACHE_SIZE
+        self._cache = OrderedDict()
+
+        # 세그먼트 코드 = (나이대 × 성별 수 + 성별) × 2^플래그 수 + ever 비트
+        self.age_bounds = np.array([upper for upper, _ in config.CATEGORY_PREFERENCE_BY_AGE])
+        age_preferences = [prefs for _, prefs in config.CATEGORY_PREFERENCE_BY_AGE]
+        age_preferences.append(config.CATEGORY_PREFERENCE_AGE_DEFAULT)
+        gender_preferences = [config.CATEGORY_PREFERENCE_BY_GENDER.get(str(g), {}) for g in gender_categories]
+        self.ever_flags = list(config.CATEGORY_PREFERENCE_BY_EVER)
+        self.n_genders = max(len(gender_preferences), 1)
+        self.n_ever_states = 2 ** len(self.ever_flags)
+        if not self.enabled:
+            return
+
+        # 카테고리별 책 인덱스와 카테고리 내부 샘플러
+        categories = catalog.categories
+        weights = np.diff(np.asarray(catalog.sampler.cumulative), prepend=0.0)
+        codes = np.asarray(catalog.category_codes)
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(categories) + 1))
+        self.category_books = [order[bounds[c]:bounds[c + 1]] for c in range(len(categories))]
+        self.category_samplers = [WeightedSampler(weights[books]) for books in self.category_books]
+        self.category_mass = np.array([weights[books].sum() for books in self.category_books])
+
+        def multipliers(prefs):
+            return np.array([prefs.get(category, 1.0) for category in categories], dtype=np.float64)
+
+        self.age_multipliers = [multipliers(prefs) for prefs in age_preferences]
+        self.gender_multipliers = [multipliers(prefs) for prefs in gender_preferences] or [multipliers({})]
+        self.ever_multipliers = [multipliers(config.CATEGORY_PREFERENCE_BY_EVER[flag]) for flag in self.ever_flags]
+
+    def segment_codes(self, ages, gender_codes, ever_flags):
+        """
+        유저 컬럼 배열 → 세그먼트 코드(int32) 배열.
+        ever_flags는 {플래그 이름: bool 배열}이며, 없는 플래그는 False로 본다.
+        """
+        age_band = np.searchsorted(self.age_bounds, np.asarray(ages), side='right')
+        gender = np.clip(np.asarray(gender_codes, dtype=np.int64), 0, self.n_genders - 1)
+        ever_bits = np.zeros(len(age_band), dtype=np.int64)
+        for bit, flag in enumerate(self.ever_flags):
+            if flag in ever_flags:
+                ever_bits |= np.asarray(ever_flags[flag], dtype=bool).astype(np.int64) << bit
+        return ((age_band * self.n_genders + gender) * self.n_ever_states + ever_bits).astype(np.int32)
+
+    def _category_cumulative(self, segment):
+        """세그먼트의 카테고리 누적 분포 (LRU 캐시)"""
+        cumulative = self._cache.get(segment)
+        if cumulative is not None:
+            self._cache.move_to_end(segment)
+            return cumulative
+
+        rest, ever_bits = divmod(segment, self.n_ever_states)
+        age_band, gender = divmod(rest, self.n_genders)
+        weights = self.category_mass * self.age_multipliers[age_band] * self.gender_multipliers[gender]
+        for bit, flag_multipliers in enumerate(self.ever_multipliers):
+            if ever_bits >> bit & 1:
+                weights = weights * flag_multipliers
+        cumulative = WeightedSampler(weights).cumulative
+
+        self._cache[segment] = cumulative
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return cumulative
+
+    def sample_one(self, rng, segment):
+        """세그먼트 유저 1명이 고르는 책 인덱스"""
+        if not self.enabled:
+            return self.catalog.sample_one(rng)
+        category = int(np.searchsorted(self._category_cumulative(int(segment)), rng.random(), side='right'))
+        return int(self.category_books[category][self.category_samplers[category].sample_one(rng)])
+
+    def sample(self, rng, segments):
+        """세그먼트 배열의 유저마다 책 인덱스 1개씩 추출 (배치 엔진용)"""
+        segments = np.asarray(segments)
+        if not self.enabled:
+            return self.catalog.sample(rng, len(segments))
+        unique, inverse = np.unique(segments, return_inverse=True)
+        cumulative = np.stack([self._category_cumulative(int(s)) for s in unique.tolist()])
+        categories = (rng.random(len(segments))[:, None] >= cumulative[inverse]).sum(axis=1)
+
+        books = np.empty(len(segments), dtype=np.int64)
+        for category, category_books in enumerate(self.category_books):
+            rows = np.flatnonzero(categories == category)
+            if len(rows):
+                books[rows] = category_books[self.category_samplers[category].sample(rng, len(rows))]
+        return books
@@ -0,0 +1,232 @@
+import json
+import os
+import pickle
+import re
+import shutil
+
+import numpy as np
+
+from batch_engine import to_epoch_seconds
+from sinks import open_sink
+
+# ----------------------------------------------------
+# 체크포인트 기반 재개/추가 생성
+# ----------------------------------------------------
+SEGMENT_SEED_KEY = 1  # 추가 기간(segment)의 RNG 시드 spawn_key 접두어 (병렬 샤드 시드와 겹치지 않도록)
+CHUNK_FILE = re.compile(r'^chunk-(\d+)')
+
+
+class CheckpointedRun:
+    """
+    세션을 checkpoint_sessions개 단위(chunk)로 생성하고, chunk마다 출력 파일과 생성기 상태를 저장하는 실행기.
+
+        root/
+            checkpoint.json          # 설정, 기간(segment) 목록, 완료된 chunk 수, 다음 세션 인덱스
+            state-00012.pkl          # 마지막 완료 chunk 직후의 생성기 상태 (RNG, 유저 버퍼, 유저별 상태)
+            chunk-00000.csv ...      # 완료된 chunk 출력 (parquet_partitioned면 date=.../chunk-00000-part-00000.parquet)
+            _inprogress/             # 진행 중인 chunk (재개 시 삭제)
+
+    chunk는 _inprogress에 다 쓴 뒤 제자리로 옮기고, 상태 파일 → checkpoint.json 순서로 원자적으로 교체한다.
+    중간에 중단되면 checkpoint.json에 기록된 chunk까지만 유효하며, 다시 run()하면 그 직후 상태를 복원해
+    이어서 생성하므로 중단 없이 실행한 것과 같은 결과가 나온다.
+    (출력은 하나의 RNG 스트림을 차례로 쓰는 순차 경로로 만든다. workers 설정은 사용하지 않는다.)
+
+    append(end_date, ...)는 마지막 기간 끝부터 새 기간을 추가한다. 새 기간은 (seed, 기간 번호)에서 파생한
+    RNG로 생성하고 이전 기간 끝의 유저별 상태를 이어받으므로, 기존 chunk는 다시 만들지 않는다.
+    """
+
+    MANIFEST = 'checkpoint.json'
+    IN_PROGRESS = '_inprogress'
+
+    def __init__(self, generator, root, output_format='csv', checkpoint_sessions=100000, **sink_kwargs):
+        if generator.seed is None:
+            raise ValueError("체크포인트 실행에는 input_data['seed']가 필요합니다.")
+        self.generator = generator
+        self.root = root
+        self.output_format = output_format
+        self.sink_kwargs = sink_kwargs
+        # batch 엔진은 블록 단위로 난수를 뽑으므로 chunk 경계를 batch_size 배수에 맞춘다
+        if generator.engine == 'batch':
+            checkpoint_sessions = -(-checkpoint_sessions // generator.batch_size) * generator.batch_size
+        self.checkpoint_sessions = checkpoint_sessions
+        self._base_input = dict(generator.input_data)
+        self._configured_segment = 0  # 생성기가 현재 설정된 기간 번호 (생성 직후는 첫 기간)
+        os.makedirs(root, exist_ok=True)
+        self.manifest = self._load_manifest()
+
+    # --- manifest ---------------------------------------------------------
+    def _manifest_path(self):
+        return os.path.join(self.root, self.MANIFEST)
+
+    def _signature(self):
+        """재개 가능 여부를 판단하는 설정값 (기간 관련 값은 segment에 따로 기록)"""
+        signature = {k: v for k, v in self._base_input.items()
+                     if k not in ('start_date', 'end_date', 'total_sessions', 'sessions_per_day', 'workers')}
+        signature.update(output_format=self.output_format, checkpoint_sessions=self.checkpoint_sessions,
+                         sink_kwargs=self.sink_kwargs)
+        return json.loads(json.dumps(signature, default=str))
+
+    def _load_manifest(self):
+        path = self._manifest_path()
+        if not os.path.exists(path):
+            first = {
+                'start_date': self._base_input['start_date'],
+                'end_date': self._base_input['end_date'],
+                'total_sessions': self.generator.total_sessions,
+                'next_session': 0,
+            }
+            return {'signature': self._signature(), 'segments': [first], 'chunks': 0, 'rows': 0, 'state_file': None}
+
+        with open(path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest['signature'] != self._signature():
+            raise ValueError(f"'{self.root}'의 체크포인트와 현재 설정이 다릅니다. 같은 input_data/출력 설정으로 실행하세요.")
+        return manifest
+
+    def _save_manifest(self):
+        _atomic_write(self._manifest_path(), json.dumps(self.manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+
+    # --- 실행 ----------------------------------------------------------------
+    def run(self):
+        """완료되지 않은 기간을 마지막 체크포인트부터 끝까지 생성. 이번 호출에서 기록한 행 수를 반환"""
+        self._discard_uncommitted()
+        rows_before = self.manifest['rows']
+        for segment_index, segment in enumerate(self.manifest['segments']):
+            if segment['next_session'] >= segment['total_sessions']:
+                continue
+            self._configure_segment(segment_index, segment)
+            while segment['next_session'] < segment['total_sessions']:
+                first = segment['next_session']
+                last = min(first + self.checkpoint_sessions, segment['total_sessions'])
+                rows = self._write_chunk(first, last)
+                segment['next_session'] = last
+                self._commit(rows)
+                print(f"💾 체크포인트: 기간 {segment_index} 세션 {last}/{segment['total_sessions']} "
+                      f"(chunk {self.manifest['chunks']}, 누적 {self.manifest['rows']}행)")
+            self.generator.user_state.finish(int(to_epoch_seconds(self.generator.end_date) // 86400))
+        shutil.rmtree(os.path.join(self.root, self.IN_PROGRESS), ignore_errors=True)
+        return self.manifest['rows'] - rows_before
+
+    def append(self, end_date, total_sessions=None, sessions_per_day=None):
+        """
+        마지막 기간 끝(end_date 미포함)부터 새 end_date까지 기간을 추가하고 생성.
+        total_sessions/sessions_per_day를 생략하면 기존 기간과 같은 하루 평균 세션 수를 쓴다.
+        """
+        last = self.manifest['segments'][-1]
+        if sessions_per_day is not None and self._base_input.get('load_profile') is None:
+            raise ValueError("sessions_per_day는 input_data['load_profile']과 함께 사용해야 합니다.")
+        if end_date <= last['end_date']:
+            raise ValueError(f"추가할 end_date '{end_date}'가 기존 기간 끝 '{last['end_date']}'보다 뒤여야 합니다.")
+        segment = {'start_date': last['end_date'], 'end_date': end_date, 'next_session': 0}
+        if sessions_per_day is not None:
+            segment['sessions_per_day'] = sessions_per_day
+        elif total_sessions is not None:
+            segment['total_sessions'] = total_sessions
+        else:
+            days = np.datetime64(last['end_date']) - np.datetime64(last['start_date'])
+            new_days = np.datetime64(end_date) - np.datetime64(last['end_date'])
+            segment['total_sessions'] = int(round(last['total_sessions'] * (new_days / days)))
+
+        segment_index = len(self.manifest['segments'])
+        self._configure_segment(segment_index, segment)  # sessions_per_day면 여기서 세션 수가 정해진다
+        segment['total_sessions'] = self.generator.total_sessions
+        self.manifest['segments'].append(segment)
+        self._save_manifest()
+        return self.run()
+
+    def _configure_segment(self, segment_index, segment):
+        """생성기를 segment 기간으로 설정하고 마지막 체크포인트 상태를 복원"""
+        generator = self.generator
+        state = self._load_state()
+        if segment_index != self._configured_segment:
+            segment_input = dict(self._base_input, start_date=segment['start_date'], end_date=segment['end_date'])
+            segment_input.pop('sessions_per_day', None)
+            if 'sessions_per_day' in segment:
+                segment_input['sessions_per_day'] = segment['sessions_per_day']
+            else:
+                segment_input['total_sessions'] = segment['total_sessions']
+            generator._load_settings(generator.config, segment_input)
+            generator.reseed(np.random.SeedSequence(generator.seed, spawn_key=(SEGMENT_SEED_KEY, segment_index)))
+            self._configured_segment = segment_index
+
+        if state is None:
+            return
+        if segment['next_session'] > 0:
+            generator.set_state(state)  # 기간 중간에서 재개: RNG까지 그대로 이어감
+        else:
+            generator.set_state(state, restore_rng=False)  # 새 기간 시작: 유저별 상태만 이어받음
+
+    def _write_chunk(self, first, last):
+        """세션 [first, last)를 _inprogress에 쓴 뒤 root로 옮기고 기록한 행 수를 반환"""
+        chunk_name = f"chunk-{self.manifest['chunks']:05d}"
+        staging = os.path.join(self.root, self.IN_PROGRESS)
+        os.makedirs(staging, exist_ok=True)
+        path = os.path.join(staging, chunk_name + _extension(self.output_format))
+
+        sink = open_sink(self.output_format, path, **self.sink_kwargs)
+        with sink:
+            for events in self.generator._iter_session_range(first, last):
+                sink.write_buffer(events)
+
+        if os.path.isdir(path):
+            # 파티션 디렉터리: 파일마다 chunk 이름을 붙여 같은 파티션 경로로 이동
+            for directory, _, files in os.walk(path):
+                target_dir = os.path.join(self.root, os.path.relpath(directory, path))
+                os.makedirs(target_dir, exist_ok=True)
+                for name in files:
+                    os.replace(os.path.join(directory, name), os.path.join(target_dir, f"{chunk_name}-{name}"))
+            shutil.rmtree(path)
+        else:
+            os.replace(path, os.path.join(self.root, os.path.basename(path)))
+        return sink.rows_written
+
+    def _commit(self, rows):
+        """chunk 완료 기록: 새 상태 파일 저장 → manifest 교체 → 이전 상태 파일 삭제"""
+        previous_state = self.manifest['state_file']
+        state_file = f"state-{self.manifest['chunks']:05d}.pkl"
+        _atomic_write(os.path.join(self.root, state_file),
+                      pickle.dumps(self.generator.get_state(), protocol=pickle.HIGHEST_PROTOCOL))
+        self.manifest['chunks'] += 1
+        self.manifest['rows'] += rows
+        self.manifest['state_file'] = state_file
+        self._save_manifest()
+        if previous_state and previous_state != state_file:
+            _remove(os.path.join(self.root, previous_state))
+
+    def _load_state(self):
+        if not self.manifest['state_file']:
+            return None
+        with open(os.path.join(self.root, self.manifest['state_file']), 'rb') as f:
+            return pickle.load(f)
+
+    def _discard_uncommitted(self):
+        """manifest에 기록되지 않은 chunk 출력/상태 파일 삭제 (중단된 실행의 흔적)"""
+        shutil.rmtree(os.path.join(self.root, self.IN_PROGRESS), ignore_errors=True)
+        committed = self.manifest['chunks']
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                match = CHUNK_FILE.match(name)
+                if match and int(match.group(1)) >= committed:
+                    _remove(os.path.join(directory, name))
+                elif name.startswith('state-') and name != self.manifest['state_file']:
+                    _remove(os.path.join(directory, name))
+
+
+def _extension(output_format):
+    return {'csv': '.csv', 'jsonl': '.jsonl', 'parquet': '.parquet'}.get(output_format, '')
+
+
+def _atomic_write(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
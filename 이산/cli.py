@@ -0,0 +1,301 @@
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+# pandas/numpy/pyarrow를 쓰는 생성기 모듈은 설정을 다 읽고 검증한 뒤 run()에서 import한다.
+# (--help, --print-config, 설정 오류는 무거운 import 없이 바로 끝난다)
+
+# ----------------------------------------------------
+# 1. 실행 설정 스키마
+# ----------------------------------------------------
+# 섹션별 기본값. input/config 섹션은 지정한 키만 넘기므로 기본값은 생성기/Config의 값을 그대로 쓴다.
+DEFAULT_SETTINGS = {
+    'paths': {
+        'book_db': 'BDB/biblio_data_with_weights.csv',  # null이면 책 정보 없이 생성
+        'user_pool': 'user_pool.csv',
+    },
+    'input': {},   # SyntheticDataGenerator input_data (INPUT_KEYS)
+    'config': {},  # a.Config 속성 덮어쓰기 (예: {"RECONNECT_PROB": 0.3, "PROB_SEARCH": {...}})
+    'output': {
+        'format': 'parquet_partitioned',  # csv / jsonl / parquet / parquet_partitioned
+        'path': 'synthetic_event_logs',
+        'chunk_rows': None,               # sink 청크 크기 (null이면 sink 기본값)
+        'sort_by_user': False,            # true면 sinks.UserSortedSink로 감싸 user_id → timestamp 순서로 기록
+        'summary': None,                  # 세션 요약 경로 (.csv / .parquet)
+        'rollups': None,                  # 일/주별 롤업 CSV 디렉터리
+        'checkpoint_dir': None,           # 지정하면 checkpoint.CheckpointedRun으로 재개 가능하게 생성
+        'checkpoint_sessions': 100000,
+    },
+    'profile': {
+        'enabled': False,
+        'metrics_path': None,  # JSON Lines 진행 메트릭 경로 (지정하면 enabled로 간주)
+        'interval_sec': 10.0,
+        'trace_allocations': False,
+    },
+}
+
+INPUT_KEYS = [
+    'total_sessions', 'users_to_sample', 'start_date', 'end_date', 'seed', 'engine', 'batch_size',
+    'workers', 'shard_size', 'load_profile', 'sessions_per_day', 'user_state_dir',
+]
+REQUIRED_INPUT_KEYS = ['start_date', 'end_date']
+
+# ----------------------------------------------------
+# 2. 설정 파일 로드 / 병합 / 검증
+# ----------------------------------------------------
+def load_settings_file(path):
+    """JSON 또는 YAML(.yaml/.yml, PyYAML 필요) 실행 설정 파일 로드"""
+    with open(path, encoding='utf-8') as f:
+        if os.path.splitext(path)[1].lower() in ('.yaml', '.yml'):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("YAML 설정 파일을 읽으려면 PyYAML이 필요합니다. (pip install pyyaml) JSON 설정을 사용하세요.") from None
+            settings = yaml.safe_load(f)
+        else:
+            settings = json.load(f)
+    if not isinstance(settings, dict):
+        raise ValueError(f"설정 파일 '{path}'의 최상위 값은 객체(dict)여야 합니다.")
+    return settings
+
+
+def merge_settings(base, override):
+    """섹션 단위로 override를 base 위에 덮어쓴 새 설정 (모르는 섹션이면 ValueError)"""
+    merged = copy.deepcopy(base)
+    for section, values in (override or {}).items():
+        if section not in DEFAULT_SETTINGS:
+            raise ValueError(f"알 수 없는 설정 섹션 '{section}' ({', '.join(DEFAULT_SETTINGS)})")
+        if not isinstance(values, dict):
+            raise ValueError(f"설정 섹션 '{section}'은 객체(dict)여야 합니다.")
+        merged[section].update(copy.deepcopy(values))
+    return merged
+
+
+def validate_settings(settings):
+    """생성기를 만들기 전에 확인할 수 있는 설정 오류를 ValueError로 알린다"""
+    input_data = settings['input']
+    unknown = set(input_data) - set(INPUT_KEYS)
+    if unknown:
+        raise ValueError(f"알 수 없는 input 키: {sorted(unknown)} ({', '.join(INPUT_KEYS)})")
+    for key in REQUIRED_INPUT_KEYS:
+        if input_data.get(key) is None:
+            raise ValueError(f"input.{key}가 필요합니다. (설정 파일 또는 --{key.replace('_', '-')})")
+    try:
+        start_date = datetime.strptime(input_data['start_date'], '%Y-%m-%d')
+        end_date = datetime.strptime(input_data['end_date'], '%Y-%m-%d')
+    except (TypeError, ValueError):
+        raise ValueError("input.start_date / input.end_date는 YYYY-MM-DD 형식이어야 합니다.") from None
+    if end_date <= start_date:
+        raise ValueError("종료 날짜는 시작 날짜보다 늦어야 합니다.")
+    if input_data.get('sessions_per_day') is not None and input_data.get('load_profile') is None:
+        raise ValueError("input.sessions_per_day는 input.load_profile과 함께 지정해야 합니다. (--load-profile)")
+
+    for section in ('output', 'profile', 'paths'):
+        unknown = set(settings[section]) - set(DEFAULT_SETTINGS[section])
+        if unknown:
+            raise ValueError(f"알 수 없는 {section} 키: {sorted(unknown)} ({', '.join(DEFAULT_SETTINGS[section])})")
+    output = settings['output']
+    if output['checkpoint_dir'] and (output['summary'] or output['rollups']):
+        raise ValueError("체크포인트 실행(output.checkpoint_dir)은 세션 요약/롤업과 함께 쓸 수 없습니다.")
+    if output['checkpoint_dir'] and output['sort_by_user']:
+        raise ValueError("체크포인트 실행(output.checkpoint_dir)은 유저별 정렬 출력(output.sort_by_user)과 함께 쓸 수 없습니다.")
+    if settings['config']:
+        settings['config'] = check_config_overrides(settings['config'])
+    return settings
+
+
+def check_config_overrides(overrides):
+    """
+    config 섹션 값을 a.Config 기본값의 타입으로 확인한 dict (정수는 실수 설정에 쓰면 float로 변환).
+    Config에 없는 이름이거나 타입이 맞지 않으면 ValueError. (config 섹션이 있을 때만 a를 import한다)
+    """
+    from a import Config
+
+    checked = {}
+    for name, value in overrides.items():
+        if not hasattr(Config, name):
+            raise ValueError(f"Config에 '{name}' 설정이 없습니다.")
+        default = getattr(Config, name)
+        if isinstance(default, bool):
+            valid = isinstance(value, bool)
+        elif isinstance(default, int):
+            valid = isinstance(value, int) and not isinstance(value, bool)
+        elif isinstance(default, float):
+            valid = isinstance(value, (int, float)) and not isinstance(value, bool)
+            value = float(value) if valid else value
+        elif isinstance(default, (list, tuple)):
+            valid = isinstance(value, (list, tuple))
+        else:
+            valid = isinstance(value, type(default))
+        if not valid:
+            raise ValueError(f"Config.{name}은 {type(default).__name__} 값이어야 합니다. (받은 값: {value!r})")
+        checked[name] = value
+    return checked
+
+
+def make_config(overrides):
+    """a.Config 인스턴스에 config 섹션 값을 덮어쓴다 (Config에 없는 이름이거나 타입이 다르면 ValueError)"""
+    from a import Config
+
+    config = Config()
+    for name, value in check_config_overrides(overrides).items():
+        setattr(config, name, value)
+    return config
+
+# ----------------------------------------------------
+# 3. 라이브러리 API
+# ----------------------------------------------------
+def build_generator(settings):
+    """실행 설정으로 SyntheticDataGenerator 생성 (서적 DB/사용자 풀이 없으면 FileNotFoundError)"""
+    import pandas as pd
+    from a import SyntheticDataGenerator
+
+    config = make_config(settings['config'])
+    book_db_path = settings['paths']['book_db']
+    if book_db_path:
+        book_db = pd.read_csv(book_db_path)
+        print(f"✅ 서적 DB ('{book_db_path}') 로딩 성공!")
+    else:
+        book_db = pd.DataFrame()
+    return SyntheticDataGenerator(config, book_db, dict(settings['input']), user_pool_path=settings['paths']['user_pool'])
+
+
+def run(settings):
+    """
+    실행 설정(dict, DEFAULT_SETTINGS 형식)대로 이벤트를 생성해 기록하고 결과 요약 dict를 반환.
+
+        from cli import run
+        run({'input': {'start_date': '2024-01-01', 'end_date': '2024-02-01', 'total_sessions': 10000, 'seed': 1},
+             'output': {'format': 'csv', 'path': 'events.csv'}})
+    """
+    settings = validate_settings(merge_settings(DEFAULT_SETTINGS, settings))
+    output = settings['output']
+    profile = settings['profile']
+    start = time.perf_counter()
+    generator = build_generator(settings)
+    sink_kwargs = {'chunk_rows': output['chunk_rows']} if output['chunk_rows'] else {}
+
+    result = {'output': output['path'], 'format': output['format'], 'sessions': generator.total_sessions}
+    if output['checkpoint_dir']:
+        from checkpoint import CheckpointedRun
+
+        checkpointed = CheckpointedRun(generator, output['checkpoint_dir'], output_format=output['format'],
+                                       checkpoint_sessions=output['checkpoint_sessions'], **sink_kwargs)
+        checkpointed.run()
+        result.update(output=output['checkpoint_dir'], rows=checkpointed.manifest['rows'])
+    else:
+        from sinks import UserSortedSink, open_sink
+
+        summary = None
+        if output['summary'] or output['rollups']:
+            from summary import SessionSummarizer
+            summary = SessionSummarizer(generator, path=output['summary'], rollups=bool(output['rollups']))
+        profiler = None
+        if profile['enabled'] or profile['metrics_path']:
+            from profiler import GenerationProfiler
+            profiler = GenerationProfiler(profile['metrics_path'], profile['interval_sec'], profile['trace_allocations'])
+
+        sink = open_sink(output['format'], output['path'], **sink_kwargs)
+        if output['sort_by_user']:
+            sink = UserSortedSink(sink, generator.max_user_id(), **sink_kwargs)
+        rows = generator.write_sessions(sink, summary=summary, profiler=profiler)
+        result['rows'] = rows
+        if summary is not None:
+            result['summary'] = output['summary']
+            if output['rollups']:
+                summary.write_rollups(output['rollups'])
+                result['rollups'] = output['rollups']
+        if profiler is not None:
+            result['profile'] = profiler.report()
+
+    result['elapsed_sec'] = round(time.perf_counter() - start, 3)
+    return result
+
+# ----------------------------------------------------
+# 4. 명령행 진입점
+# ----------------------------------------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="합성 이벤트 로그 생성기 (비대화식). 설정 파일 값은 명령행 옵션으로 덮어쓸 수 있다."
+    )
+    parser.add_argument('-c', '--config', help="실행 설정 파일 (JSON 또는 YAML)")
+    parser.add_argument('--print-config', action='store_true', help="병합된 실행 설정을 출력하고 종료")
+
+    group = parser.add_argument_group('input')
+    group.add_argument('--start-date', help="생성 시작 날짜 (YYYY-MM-DD)")
+    group.add_argument('--end-date', help="생성 종료 날짜 (YYYY-MM-DD, 미포함)")
+    group.add_argument('--sessions', type=int, dest='total_sessions', help="총 세션 수")
+    group.add_argument('--users', type=int, dest='users_to_sample', help="세션에 참여시킬 유저 수")
+    group.add_argument('--seed', type=int)
+    group.add_argument('--engine', choices=['scalar', 'batch'])
+    group.add_argument('--workers', type=int, help="병렬 워커 수")
+    group.add_argument('--load-profile', help="시간/요일/월별 부하 프로파일 JSON 경로")
+    group.add_argument('--sessions-per-day', type=float, help="하루 평균 세션 수 (--load-profile과 함께 사용)")
+    group.add_argument('--user-state-dir', help="유저 상태 스냅샷 디렉터리 (USER_STATE_SNAPSHOT_DAYS마다 .npz 기록)")
+
+    group = parser.add_argument_group('paths / output')
+    group.add_argument('--book-db', help="서적 DB CSV 경로")
+    group.add_argument('--user-pool', help="사용자 풀 경로 (CSV/Parquet/Feather/store)")
+    group.add_argument('--format', choices=['csv', 'jsonl', 'parquet', 'parquet_partitioned'])
+    group.add_argument('-o', '--output', help="이벤트 출력 경로")
+    group.add_argument('--sort-by-user', action='store_true', help="user_id → timestamp 순서로 정렬해 기록 (외부 정렬)")
+    group.add_argument('--summary', help="세션 요약 출력 경로 (.csv / .parquet)")
+    group.add_argument('--rollups', help="일/주별 롤업 CSV 디렉터리")
+    group.add_argument('--checkpoint-dir', help="체크포인트 디렉터리 (중단 후 같은 명령으로 재개)")
+    group.add_argument('--set', action='append', default=[], metavar='NAME=VALUE',
+                       help="Config 값 덮어쓰기 (VALUE는 JSON, 예: --set RECONNECT_PROB=0.3)")
+
+    group = parser.add_argument_group('profile')
+    group.add_argument('--profile', action='store_true', help="단계별 시간/처리량 프로파일 출력")
+    group.add_argument('--metrics', help="진행 메트릭 JSON Lines 경로")
+    group.add_argument('--metrics-interval', type=float, help="메트릭 기록 간격 (초)")
+    return parser.parse_args(argv)
+
+
+def settings_from_args(args):
+    """설정 파일 + 명령행 옵션(지정한 것만)으로 실행 설정 구성"""
+    settings = merge_settings(DEFAULT_SETTINGS, load_settings_file(args.config) if args.config else {})
+    overrides = {
+        'input': {key: getattr(args, key) for key in (
+            'start_date', 'end_date', 'total_sessions', 'users_to_sample', 'seed', 'engine', 'workers',
+            'load_profile', 'sessions_per_day', 'user_state_dir')},
+        'paths': {'book_db': args.book_db, 'user_pool': args.user_pool},
+        'output': {'format': args.format, 'path': args.output, 'summary': args.summary, 'rollups': args.rollups,
+                   'checkpoint_dir': args.checkpoint_dir, 'sort_by_user': args.sort_by_user or None},
+        'profile': {'enabled': args.profile or None, 'metrics_path': args.metrics, 'interval_sec': args.metrics_interval},
+    }
+    for section, values in overrides.items():
+        settings[section].update({key: value for key, value in values.items() if value is not None})
+
+    for assignment in args.set:
+        name, sep, value = assignment.partition('=')
+        if not sep:
+            raise ValueError(f"--set은 NAME=VALUE 형식이어야 합니다. ('{assignment}')")
+        try:
+            settings['config'][name] = json.loads(value)
+        except json.JSONDecodeError:
+            settings['config'][name] = value
+    return settings
+
+
+def main(argv=None):
+    try:
+        args = parse_args(argv)
+        settings = validate_settings(settings_from_args(args))
+        if args.print_config:
+            print(json.dumps(settings, ensure_ascii=False, indent=2))
+            return 0
+        result = run(settings)
+    except (FileNotFoundError, ValueError, ImportError) as e:
+        print(f"⚠️ 오류: {e}", file=sys.stderr)
+        return 1
+    print(f"✅ 완료: {result['rows']}개 로그 → '{result['output']}' ({result['elapsed_sec']:.2f}초)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,179 @@
+import sys
+
+import numpy as np
+
+# ----------------------------------------------------
+# 1. 이벤트 코드 (이벤트 이름 intern 테이블)
+# ----------------------------------------------------
+# 고정 이벤트 4종 + 규칙(상태) 이벤트는 RULE_EVENT_BASE + rule_id
+EVENT_APP_LAUNCH = 0
+EVENT_VIEW_MAIN_PAGE = 1
+EVENT_DROP_OFF = 2
+EVENT_RECONNECT = 3
+RULE_EVENT_BASE = 4
+FIXED_EVENT_NAMES = ['App Launch', 'View Main Page', 'drop-off', 'Reconnect_Session']
+
+ITEM_COLUMNS = ('item_id', 'item_title', 'item_price', 'item_category')
+
+
+def event_names_for(transitions):
+    """이벤트 코드 → 이벤트 이름 목록 (고정 이벤트 + 컴파일된 규칙 이름)"""
+    return FIXED_EVENT_NAMES + transitions.rule_names
+
+# ----------------------------------------------------
+# 2. struct-of-arrays 이벤트 블록
+# ----------------------------------------------------
+class EventBuffer:
+    """
+    세션 여러 개의 이벤트를 컬럼 배열로 보관하는 블록. 이벤트마다 dict/문자열을 만들지 않는다.
+
+        이벤트 단위: session(블록 내 세션 번호, int32), timestamp_ms(epoch 밀리초, int64),
+                     event_code(int16), event_sequence(int32), is_logged_in(int8, -1=없음),
+                     time_spent_sec(float64, NaN=없음), item(카탈로그 인덱스 int64, -1=없음)
+        세션 단위:   session_ids(문자열 목록), session_user_ids(user_id 배열),
+                     session_is_new(bool 배열, 세션 시작 시 유저 상태의 session_count가 0이었으면 True)
+
+    이벤트 이름, 세션 ID, 타임스탬프 문자열, 책 필드는 sink에 넘길 때(to_columns) 한 번에 변환한다.
+    pickle할 때 catalog는 빼고 보내므로(병렬 워커 → 부모) 받는 쪽에서 catalog를 다시 연결해야 한다.
+    """
+
+    ARRAY_FIELDS = ('session', 'timestamp_ms', 'event_code', 'event_sequence', 'is_logged_in', 'time_spent_sec', 'item')
+
+    def __init__(self, event_names, catalog, session_ids, session_user_ids, session, timestamp_ms, event_code,
+                 event_sequence, is_logged_in, time_spent_sec, item, session_is_new=None):
+        self.event_names = event_names
+        self.catalog = catalog
+        self.session_ids = session_ids
+        self.session_user_ids = session_user_ids
+        self.session_is_new = np.zeros(len(session_ids), dtype=bool) if session_is_new is None else session_is_new
+        self.session = session
+        self.timestamp_ms = timestamp_ms
+        self.event_code = event_code
+        self.event_sequence = event_sequence
+        self.is_logged_in = is_logged_in
+        self.time_spent_sec = time_spent_sec
+        self.item = item
+
+    def __len__(self):
+        return len(self.session)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['catalog'] = None
+        return state
+
+    @property
+    def nbytes(self):
+        """배열 + 세션 ID 문자열이 차지하는 바이트 수 (대략값)"""
+        array_bytes = sum(getattr(self, name).nbytes for name in self.ARRAY_FIELDS)
+        session_bytes = sum(sys.getsizeof(s) for s in self.session_ids) + sys.getsizeof(self.session_ids)
+        return array_bytes + session_bytes + np.asarray(self.session_user_ids).nbytes
+
+    def head(self, n):
+        """앞에서 n개 이벤트만 담은 블록 (세션 목록은 공유)"""
+        arrays = [getattr(self, name)[:n] for name in self.ARRAY_FIELDS]
+        return EventBuffer(self.event_names, self.catalog, self.session_ids, self.session_user_ids, *arrays,
+                           session_is_new=self.session_is_new)
+
+    def timestamp_strings(self):
+        """epoch 밀리초 → ISO-8601 문자열 목록 (YYYY-MM-DDTHH:MM:SS.mmm)"""
+        return np.datetime_as_string(self.timestamp_ms.astype('datetime64[ms]'), unit='ms').tolist()
+
+    def to_columns(self):
+        """sinks.EVENT_COLUMNS 순서의 컬럼 → 값 리스트 (없는 값은 None)"""
+        n = len(self)
+        names = np.asarray(self.event_names, dtype=object)
+        session_ids = np.asarray(self.session_ids, dtype=object)
+        columns = {
+            'event_name': names[self.event_code].tolist(),
+            'session_id': session_ids[self.session].tolist(),
+            'user_id': np.asarray(self.session_user_ids)[self.session].tolist(),
+            'timestamp': self.timestamp_strings(),
+            'event_sequence': self.event_sequence.tolist(),
+            'is_logged_in': np.array([None, False, True], dtype=object)[self.is_logged_in + 1].tolist(),
+            'time_spent_sec': np.where(np.isnan(self.time_spent_sec), None, self.time_spent_sec).tolist(),
+        }
+
+        item_rows = np.flatnonzero(self.item >= 0)
+        item_columns = self.catalog.item_columns(self.item[item_rows]) if len(item_rows) else {}
+        for name in ITEM_COLUMNS:
+            values = np.full(n, None, dtype=object)
+            if name in item_columns:
+                values[item_rows] = item_columns[name]
+            columns[name] = values.tolist()
+        return columns
+
+    def to_events(self):
+        """
+        기존 이벤트 dict 형식 목록 (generate_sessions()와 미리보기용).
+        properties에는 값이 있는 필드만 넣는다.
+        """
+        columns = self.to_columns()
+        items = self.item.tolist()
+        events = []
+        for i in range(len(self)):
+            properties = {}
+            if columns['is_logged_in'][i] is not None:
+                properties['is_logged_in'] = columns['is_logged_in'][i]
+            if columns['time_spent_sec'][i] is not None:
+                properties['time_spent_sec'] = columns['time_spent_sec'][i]
+            if items[i] >= 0:
+                for name in ITEM_COLUMNS:
+                    properties[name] = columns[name][i]
+            events.append({
+                'event_name': columns['event_name'][i],
+                'session_id': columns['session_id'][i],
+                'user_id': columns['user_id'][i],
+                'timestamp': columns['timestamp'][i],
+                'event_sequence': columns['event_sequence'][i],
+                'properties': properties
+            })
+        return events
+
+
+class EventBufferBuilder:
+    """
+    scalar 엔진용: 이벤트를 하나씩 기본 타입 리스트에 추가했다가 finish()로 EventBuffer를 만든다.
+    """
+
+    def __init__(self, event_names, catalog):
+        self.event_names = event_names
+        self.catalog = catalog
+        self.session_ids = []
+        self.session_user_ids = []
+        self.session_is_new = []
+        self._columns = tuple([] for _ in EventBuffer.ARRAY_FIELDS)
+
+    def __len__(self):
+        return len(self._columns[0])
+
+    def start_session(self, session_id, user_id, is_new=False):
+        """세션을 등록하고 블록 내 세션 번호를 반환 (is_new: 이번 생성에서 유저의 첫 세션)"""
+        self.session_ids.append(session_id)
+        self.session_user_ids.append(user_id)
+        self.session_is_new.append(is_new)
+        return len(self.session_ids) - 1
+
+    def add(self, session, timestamp_ms, event_code, event_sequence, is_logged_in=-1, time_spent_sec=np.nan, item=-1):
+        session_col, time_col, code_col, seq_col, login_col, spent_col, item_col = self._columns
+        session_col.append(session)
+        time_col.append(timestamp_ms)
+        code_col.append(event_code)
+        seq_col.append(event_sequence)
+        login_col.append(is_logged_in)
+        spent_col.append(time_spent_sec)
+        item_col.append(item)
+
+    def finish(self):
+        session, timestamp_ms, event_code, event_sequence, is_logged_in, time_spent_sec, item = self._columns
+        return EventBuffer(
+            self.event_names, self.catalog, self.session_ids, np.asarray(self.session_user_ids),
+            np.array(session, dtype=np.int32),
+            np.array(timestamp_ms, dtype=np.int64),
+            np.array(event_code, dtype=np.int16),
+            np.array(event_sequence, dtype=np.int32),
+            np.array(is_logged_in, dtype=np.int8),
+            np.array(time_spent_sec, dtype=np.float64),
+            np.array(item, dtype=np.int64),
+            session_is_new=np.array(self.session_is_new, dtype=bool),
+        )
@@ -0,0 +1,204 @@
+import json
+import os
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+
+import numpy as np
+
+from book_catalog import BookCatalog
+from batch_engine import to_epoch_seconds
+from user_state import STATE_ARRAYS
+
+# ----------------------------------------------------
+# 멀티 프로세스 샤드 생성
+# ----------------------------------------------------
+def _to_mappable(values):
+    """object 배열은 np.load(mmap_mode)로 열 수 있도록 고정폭 유니코드 배열로 변환"""
+    values = np.asarray(values)
+    return values.astype(str) if values.dtype == object else values
+
+
+def export_shared_state(generator, directory):
+    """
+    부모 프로세스의 유저 컬럼/누적 가중치/서적 카탈로그 배열을 .npy로 저장.
+    워커는 이를 mmap_mode='r'로 열어 같은 페이지 캐시를 공유한다 (pickle 전송 없음).
+    """
+    arrays = {
+        'user_cumulative': generator.user_sampler.cumulative,
+        'user_ids': _to_mappable(generator._user_ids),
+        'user_gender_codes': generator._user_gender_codes,
+        'user_ages': _to_mappable(generator._user_ages),
+        'user_segments': generator._user_segments,
+    }
+    for name, values in generator.catalog.arrays().items():
+        arrays[name] = _to_mappable(values)
+    for name, values in arrays.items():
+        np.save(os.path.join(directory, f"{name}.npy"), values, allow_pickle=False)
+
+    manifest = {
+        'arrays': list(arrays),
+        'book_categories': generator.catalog.categories,
+        'gender_categories': [str(c) for c in generator._gender_categories],
+    }
+    with open(os.path.join(directory, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+
+
+def attach_shared_state(directory):
+    """export_shared_state()로 저장한 배열을 메모리 매핑으로 연결"""
+    with open(os.path.join(directory, 'manifest.json'), encoding='utf-8') as f:
+        manifest = json.load(f)
+    arrays = {
+        name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r')
+        for name in manifest['arrays']
+    }
+    shared = {name: arrays[name] for name in ('user_cumulative', 'user_ids', 'user_gender_codes', 'user_ages', 'user_segments')}
+    shared['gender_categories'] = np.asarray(manifest['gender_categories'], dtype=object)
+    shared['catalog'] = BookCatalog.from_arrays(arrays, manifest['book_categories'])
+    return shared
+
+
+def shard_seed(seed, shard_index):
+    """
+    샤드별 독립 시드. (seed, shard_index)만으로 결정되므로
+    워커 수와 관계없이 같은 샤드는 같은 난수 스트림을 받는다.
+    """
+    root = np.random.SeedSequence(seed)
+    return np.random.SeedSequence(root.entropy, spawn_key=(shard_index,))
+
+
+def shard_ranges(total_sessions, shard_size):
+    """세션 인덱스 범위를 shard_size 단위 [first, last) 구간으로 분할"""
+    return [(first, min(first + shard_size, total_sessions)) for first in range(0, total_sessions, shard_size)]
+
+
+def session_day(generator, index):
+    """세션 index의 시작 날짜 (epoch 기준 일 수, 시작 시각 노이즈는 무시한 명목 시각 기준)"""
+    if generator.scheduler is not None:
+        scheduler = generator.scheduler
+        day = int(np.searchsorted(scheduler.session_offsets, index, side='right')) - 1
+        return int(scheduler.days[min(day, scheduler.n_days - 1)])
+    step_sec = (generator.end_date - generator.start_date).total_seconds() / max(generator.total_sessions, 1)
+    return int((to_epoch_seconds(generator.start_date) + step_sec * index) // 86400)
+
+
+def state_wave(generator, first):
+    """샤드가 속한 유저 상태 주기 번호 (같은 주기의 샤드는 같은 상태에서 출발한다)"""
+    state = generator.user_state
+    return (session_day(generator, first) - state.start_day) // state.snapshot_days
+
+
+def _write_wave_state(directory, wave, state):
+    """주기 시작 시점의 유저 상태 배열을 워커가 메모리 매핑으로 읽을 수 있게 저장 (이전 주기 파일은 삭제)"""
+    path = os.path.join(directory, f"user_state-{wave}")
+    os.makedirs(path)
+    for name, values in state.arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), values, allow_pickle=False)
+    for previous in os.listdir(directory):
+        if previous.startswith('user_state-') and previous != f"user_state-{wave}":
+            shutil.rmtree(os.path.join(directory, previous), ignore_errors=True)
+
+
+# 워커 프로세스마다 한 번만 구성하는 생성기, 공유 디렉터리, 현재 주기의 유저 상태 (주기 번호, 배열)
+_worker_generator = None
+_worker_directory = None
+_worker_wave_state = None
+
+
+def _init_worker(config, input_data, directory, scheduler=None):
+    global _worker_generator, _worker_directory, _worker_wave_state
+    from a import SyntheticDataGenerator
+    shared = attach_shared_state(directory)
+    shared['scheduler'] = scheduler
+    _worker_generator = SyntheticDataGenerator._from_shared_state(config, input_data, shared)
+    _worker_directory = directory
+    _worker_wave_state = None
+
+
+def _load_wave_state(wave):
+    global _worker_wave_state
+    if _worker_wave_state is None or _worker_wave_state[0] != wave:
+        path = os.path.join(_worker_directory, f"user_state-{wave}")
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r') for name in STATE_ARRAYS}
+        _worker_wave_state = (wave, arrays)
+    return _worker_wave_state[1]
+
+
+def _run_shard(task):
+    """샤드 하나를 생성하고 (EventBuffer 목록, 주기 시작 상태 대비 유저 상태 변경분)을 반환"""
+    shard_index, first, last, seed, wave = task
+    base = _load_wave_state(wave)
+    _worker_generator.user_state.load_arrays(base)
+    _worker_generator.reseed(shard_seed(seed, shard_index))
+    buffers = list(_worker_generator._iter_session_range(first, last))
+    return buffers, _worker_generator.user_state.delta(base)
+
+
+def _attach_catalog(buffers, catalog):
+    for buffer in buffers:
+        buffer.catalog = catalog
+        yield buffer
+
+
+def iter_sessions_parallel(generator):
+    """
+    세션 인덱스 범위를 shard_size 단위로 나눠 프로세스 풀에서 생성하고 샤드 순서대로 EventBuffer를 yield.
+    워커는 배열만 담긴 EventBuffer를 돌려주고, 책 필드 변환용 catalog는 여기서 다시 연결한다.
+    샤드 경계와 샤드 시드가 워커 수와 무관하므로 같은 seed면 결과가 항상 같다.
+    도착 스케줄러를 쓰고 input_data['shard_days']가 있으면 샤드를 그 날짜 수 단위 시간 구간으로 나눈다.
+    동시에 진행 중인 샤드는 workers * 2개로 제한해 메모리 사용량이 전체 세션 수와 무관하다.
+    workers=1이면 프로세스 풀 없이 같은 샤드를 현재 프로세스에서 순서대로 실행한다.
+
+    유저 상태(user_state.UserStateStore)는 Config.USER_STATE_SNAPSHOT_DAYS 주기 단위로 진행한다.
+    같은 주기의 샤드는 모두 주기 시작 상태에서 출발해 자기 세션만 반영하고, 부모가 변경분을 합친(merge)
+    결과가 다음 주기의 시작 상태가 된다. 합치기가 순서와 무관하므로 워커 수와 관계없이 상태도 같다.
+    (한 주기 안에서는 다른 샤드의 변경이 보이지 않으며, 주기 경계에서 샤드 완료를 기다린다)
+    """
+    seed = generator.seed
+    if seed is None:
+        seed = np.random.SeedSequence().entropy  # 시드 미지정: 실행마다 다른 결과
+    shard_days = generator.input_data.get('shard_days')
+    if generator.scheduler is not None and shard_days:
+        ranges = generator.scheduler.day_shard_ranges(shard_days)  # 날짜 경계에 맞춘 시간 샤드
+    else:
+        ranges = shard_ranges(generator.total_sessions, generator.shard_size)
+    tasks = [(shard_index, first, last, seed, state_wave(generator, first)) for shard_index, (first, last) in enumerate(ranges)]
+    state = generator.user_state
+
+    def finished(result):
+        buffers, delta = result
+        state.merge(delta)
+        return _attach_catalog(buffers, generator.catalog)
+
+    def start_wave(wave):
+        state.snapshot_until(state.start_day + wave * state.snapshot_days)  # snapshot_dir가 있으면 주기 시작 스냅샷 기록
+        _write_wave_state(directory, wave, state)
+
+    directory = tempfile.mkdtemp(prefix='synthetic_shared_')
+    try:
+        export_shared_state(generator, directory)
+        init_args = (generator.config, generator.input_data, directory, generator.scheduler)
+        if generator.workers <= 1:
+            _init_worker(*init_args)
+            for wave, wave_tasks in groupby(tasks, key=lambda task: task[4]):
+                start_wave(wave)
+                for task in wave_tasks:
+                    yield from finished(_run_shard(task))
+            return
+
+        max_in_flight = generator.workers * 2
+        with ProcessPoolExecutor(max_workers=generator.workers, initializer=_init_worker, initargs=init_args) as executor:
+            for wave, wave_tasks in groupby(tasks, key=lambda task: task[4]):
+                start_wave(wave)
+                pending = deque()
+                for task in wave_tasks:
+                    pending.append(executor.submit(_run_shard, task))
+                    if len(pending) >= max_in_flight:
+                        yield from finished(pending.popleft().result())
+                while pending:
+                    yield from finished(pending.popleft().result())
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
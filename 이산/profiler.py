@@ -0,0 +1,280 @@
+import json
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from user_store import current_rss_mb
+
+# ----------------------------------------------------
+# 1. 계측 단계
+# ----------------------------------------------------
+STAGES = ['user_sampling', 'book_sampling', 'transitions', 'event_construction', 'output', 'summary']
+STAGE_LABELS = {
+    'user_sampling': '유저 샘플링',
+    'book_sampling': '책 샘플링',
+    'transitions': '상태 전이',
+    'event_construction': '이벤트 구성',
+    'output': '출력 (문자열 변환 + 기록)',
+    'summary': '세션 요약',
+    'other': '기타 (시작 시각 등)',
+}
+
+# ----------------------------------------------------
+# 2. 생성 프로파일러
+# ----------------------------------------------------
+class GenerationProfiler:
+    """
+    SyntheticDataGenerator 실행의 처리량(sessions/sec, events/sec), 단계별 시간, 메모리를 재는 프로파일러.
+
+        profiler = GenerationProfiler(metrics_path='metrics.jsonl', interval_sec=10)
+        generator.write_sessions(sink, profiler=profiler)
+        profiler.report()
+
+    attach()가 생성기/책 샘플러/sink/블록 빌더의 메서드를 인스턴스 속성으로 감싸서 시간을 재고,
+    detach()가 감싼 속성을 지워 원래 메서드로 되돌린다. 생성 코드에는 분기가 없으므로
+    프로파일러를 쓰지 않으면 오버헤드가 없다. (켜면 scalar 엔진은 이벤트마다 타이머를 호출하므로 느려진다)
+
+    단계 시간은 자기 시간(self time)이다: 상태 전이 안에서 부른 유저/책 샘플링, 이벤트 추가 시간은
+    상태 전이에서 빼고 각 단계에 넣는다. 전체 경과 시간에서 단계 합을 뺀 나머지는 'other'.
+    trace_allocations=True면 tracemalloc으로 단계별 순 할당량(해제분 차감)과 할당 최고치도 잰다.
+    병렬 모드(workers)는 생성이 워커 프로세스에서 일어나므로 출력/요약 단계와 처리량만 잰다.
+
+    metrics_path를 주면 interval_sec마다(블록 경계에서 확인) 진행 상황을 JSON Lines로 한 줄씩 쓰고,
+    끝날 때 "final": true 줄을 쓴다.
+    """
+
+    def __init__(self, metrics_path=None, interval_sec=10.0, trace_allocations=False):
+        self.metrics_path = metrics_path
+        self.interval_sec = interval_sec
+        self.trace_allocations = trace_allocations
+        self.stages = {name: [0.0, 0, 0] for name in STAGES}  # 단계 → [자기 시간(초), 호출 수, 순 할당 바이트]
+        self.sessions = 0
+        self.events = 0
+        self._stack = []
+        self._patched = []
+        self._metrics_file = None
+        self._started_tracemalloc = False
+        self._start = None
+        self._elapsed = None
+        self._traced_peak = None
+
+    # --- 계측 연결 -----------------------------------------------------------
+    def attach(self, generator, sink=None, summary=None):
+        """생성기(와 sink, summary)의 단계별 메서드를 계측 래퍼로 교체하고 측정을 시작"""
+        self._patch(generator, '_get_random_user', 'user_sampling')
+        self._patch(generator, 'sample_user_indices', 'user_sampling')
+        self._patch(generator, '_create_one_session', 'transitions')
+        if generator.book_sampler is not None:
+            self._patch(generator.book_sampler, 'sample_one', 'book_sampling')
+            self._patch(generator.book_sampler, 'sample', 'book_sampling')
+        if sink is not None:
+            self._patch(sink, 'write_buffer', 'output')
+            self._patch(sink, 'close', 'output')  # 파티션/정렬 sink는 닫을 때 남은 청크를 기록
+        if summary is not None:
+            self._patch(summary, 'add', 'summary')
+
+        builder_factory = generator.event_builder_factory
+        engine_factory = generator.batch_engine_factory
+
+        def event_builder(*args, **kwargs):
+            builder = builder_factory(*args, **kwargs)
+            self._patch(builder, 'add', 'event_construction', track=False)
+            self._patch(builder, 'finish', 'event_construction', track=False)
+            return builder
+
+        def batch_engine(*args, **kwargs):
+            engine = engine_factory(*args, **kwargs)
+            self._patch(engine, 'run', 'transitions', track=False)
+            self._patch(engine, '_make_session_ids', 'event_construction', track=False)
+            self._patch(engine, '_materialize', 'event_construction', track=False)
+            return engine
+
+        self._set_attr(generator, 'event_builder_factory', event_builder)
+        self._set_attr(generator, 'batch_engine_factory', batch_engine)
+        self.start()
+        return self
+
+    def detach(self):
+        """계측 래퍼를 지워 원래 메서드로 되돌리고 측정을 끝낸다"""
+        for obj, name in reversed(self._patched):
+            obj.__dict__.pop(name, None)
+        self._patched = []
+        self.finish()
+
+    def _set_attr(self, obj, name, value):
+        obj.__dict__[name] = value
+        self._patched.append((obj, name))
+
+    def _patch(self, obj, name, stage, track=True):
+        """obj.name 메서드를 stage 시간 측정 래퍼로 교체 (track=False면 detach 때 되돌리지 않는 임시 객체)"""
+        func = getattr(obj, name)
+        wrapper = self._timed_alloc(func, stage) if self.trace_allocations else self._timed(func, stage)
+        if track:
+            self._set_attr(obj, name, wrapper)
+        else:
+            obj.__dict__[name] = wrapper
+
+    def _timed(self, func, stage_name):
+        stack = self._stack
+        stage = self.stages[stage_name]
+        clock = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = clock()
+            stack.append([0.0, 0])
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                child = stack.pop()
+                stage[0] += elapsed - child[0]
+                stage[1] += 1
+                if stack:
+                    stack[-1][0] += elapsed
+        return timed
+
+    def _timed_alloc(self, func, stage_name):
+        stack = self._stack
+        stage = self.stages[stage_name]
+        clock = time.perf_counter
+        traced = tracemalloc.get_traced_memory
+
+        def timed(*args, **kwargs):
+            start = clock()
+            start_bytes = traced()[0]
+            stack.append([0.0, 0])
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                allocated = traced()[0] - start_bytes
+                child = stack.pop()
+                stage[0] += elapsed - child[0]
+                stage[1] += 1
+                stage[2] += allocated - child[1]
+                if stack:
+                    stack[-1][0] += elapsed
+                    stack[-1][1] += allocated
+        return timed
+
+    # --- 측정 ----------------------------------------------------------------
+    def start(self):
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        if self.metrics_path:
+            self._metrics_file = open(self.metrics_path, 'w', encoding='utf-8', buffering=1)
+        self._start = time.perf_counter()
+        self._last_emit = self._start
+        self._last_counts = (0, 0)
+        self._elapsed = None
+
+    def block_done(self, buffer):
+        """EventBuffer 블록 하나가 끝날 때마다 호출: 세션/이벤트 수 누적, 주기적으로 메트릭 기록"""
+        self.sessions += len(buffer.session_ids)
+        self.events += len(buffer)
+        if self._metrics_file is not None:
+            now = time.perf_counter()
+            if now - self._last_emit >= self.interval_sec:
+                self._emit(now)
+
+    def finish(self):
+        if self._start is None or self._elapsed is not None:
+            return
+        now = time.perf_counter()
+        self._elapsed = now - self._start
+        self._traced_peak = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else None
+        if self._metrics_file is not None:
+            self._emit(now, final=True)
+            self._metrics_file.close()
+            self._metrics_file = None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def _emit(self, now, final=False):
+        elapsed = now - self._start
+        interval = now - self._last_emit
+        sessions, events = self._last_counts
+        record = self.metrics(elapsed)
+        record.update({
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'interval_sessions_per_sec': (self.sessions - sessions) / interval if interval > 0 else None,
+            'interval_events_per_sec': (self.events - events) / interval if interval > 0 else None,
+            'final': final,
+        })
+        self._metrics_file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._last_emit = now
+        self._last_counts = (self.sessions, self.events)
+
+    # --- 결과 ----------------------------------------------------------------
+    @property
+    def elapsed_sec(self):
+        if self._start is None:
+            return 0.0
+        return self._elapsed if self._elapsed is not None else time.perf_counter() - self._start
+
+    def metrics(self, elapsed=None):
+        """현재까지의 측정값 dict (JSON 직렬화 가능)"""
+        elapsed = self.elapsed_sec if elapsed is None else elapsed
+        stage_sec = {name: round(stage[0], 4) for name, stage in self.stages.items()}
+        stage_sec['other'] = round(max(0.0, elapsed - sum(stage[0] for stage in self.stages.values())), 4)
+        record = {
+            'elapsed_sec': round(elapsed, 4),
+            'sessions': self.sessions,
+            'events': self.events,
+            'sessions_per_sec': round(self.sessions / elapsed, 1) if elapsed > 0 else None,
+            'events_per_sec': round(self.events / elapsed, 1) if elapsed > 0 else None,
+            'stage_sec': stage_sec,
+            'stage_calls': {name: stage[1] for name, stage in self.stages.items()},
+            'rss_mb': _round(current_rss_mb()),
+            'peak_rss_mb': _round(peak_rss_mb()),
+        }
+        if self.trace_allocations:
+            record['stage_alloc_mb'] = {name: round(stage[2] / 1e6, 3) for name, stage in self.stages.items()}
+            peak = self._traced_peak if self._elapsed is not None else (
+                tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else None)
+            record['traced_peak_mb'] = None if peak is None else round(peak / 1e6, 3)
+        return record
+
+    def report(self):
+        """단계별 시간 표와 처리량을 출력하고 metrics()를 반환"""
+        metrics = self.metrics()
+        elapsed = metrics['elapsed_sec']
+        print(f"⏱️ 생성 프로파일: {metrics['sessions']}개 세션 / {metrics['events']}개 이벤트, {elapsed:.2f}초 "
+              f"({metrics['sessions_per_sec']} sessions/sec, {metrics['events_per_sec']} events/sec)")
+        for name, seconds in metrics['stage_sec'].items():
+            share = seconds / elapsed * 100 if elapsed > 0 else 0.0
+            line = f"   {STAGE_LABELS[name]:<24} {seconds:9.3f}초 {share:5.1f}%"
+            if 'stage_alloc_mb' in metrics and name in metrics['stage_alloc_mb']:
+                line += f"  순 할당 {metrics['stage_alloc_mb'][name]:9.2f}MB"
+            print(line)
+        memory = f"   RSS {metrics['rss_mb']}MB, 최고 RSS {metrics['peak_rss_mb']}MB"
+        if metrics.get('traced_peak_mb') is not None:
+            memory += f", tracemalloc 최고 {metrics['traced_peak_mb']}MB"
+        print(memory)
+        return metrics
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.detach()
+
+
+def peak_rss_mb():
+    """프로세스 최고 RSS (MB, Linux getrusage 기준. 읽을 수 없으면 None)"""
+    if resource is None:
+        return None
+    try:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 / 1e6  # ru_maxrss는 KB 단위
+    except (OSError, ValueError):
+        return None
+
+
+def _round(value, digits=1):
+    return None if value is None else round(value, digits)
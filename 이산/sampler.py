@@ -0,0 +1,48 @@
+import numpy as np
+
+# ----------------------------------------------------
+# 가중치 기반 인덱스 샘플러
+# ----------------------------------------------------
+class WeightedSampler:
+    """
+    가중치 배열로 누적 분포(CDF)를 한 번만 만들어 두고,
+    균등 난수 + 이진 탐색(np.searchsorted)으로 인덱스를 뽑는 샘플러.
+
+    DataFrame.sample(weights=...)처럼 매 호출마다 전체 가중치를 정규화하지 않으므로
+    1회 추출 비용이 O(log N)이고, k개를 한 번의 벡터 연산으로 뽑을 수 있다.
+    """
+
+    def __init__(self, weights):
+        weights = np.asarray(weights, dtype=np.float64)
+        if weights.ndim != 1 or len(weights) == 0:
+            raise ValueError("가중치는 비어 있지 않은 1차원 배열이어야 합니다.")
+        if not np.isfinite(weights).all() or (weights < 0).any():
+            raise ValueError("가중치에 음수 또는 NaN/inf 값이 있습니다.")
+
+        cumulative = np.cumsum(weights)
+        total = cumulative[-1]
+        if total <= 0:
+            # 가중치 합이 0이면 균등 분포로 대체 (기존 generator의 정규화 규칙과 동일)
+            cumulative = np.arange(1, len(weights) + 1, dtype=np.float64)
+            total = cumulative[-1]
+
+        self.cumulative = cumulative / total
+        self.cumulative[-1] = 1.0  # 부동소수 오차로 마지막 값이 1 미만이 되는 것 방지
+
+    @classmethod
+    def from_cumulative(cls, cumulative):
+        """이미 정규화된 누적 분포 배열(메모리 매핑 배열 포함)로 샘플러를 복원"""
+        sampler = cls.__new__(cls)
+        sampler.cumulative = cumulative
+        return sampler
+
+    def __len__(self):
+        return len(self.cumulative)
+
+    def sample(self, rng, k=1):
+        """rng(np.random.Generator)로 k개의 인덱스(np.ndarray)를 복원 추출"""
+        return np.searchsorted(self.cumulative, rng.random(k), side='right')
+
+    def sample_one(self, rng):
+        """인덱스 1개 추출"""
+        return int(np.searchsorted(self.cumulative, rng.random(), side='right'))
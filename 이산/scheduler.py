@@ -0,0 +1,162 @@
+import json
+from datetime import datetime
+
+import numpy as np
+
+# ----------------------------------------------------
+# 1. 시간대별 부하 프로파일
+# ----------------------------------------------------
+class LoadProfile:
+    """
+    시간(0~23시) × 요일(월~일) × 월(1~12월) 배수로 정의하는 세션 유입 강도 프로파일.
+
+        {
+            "hourly":  [24개 값],
+            "weekday": [7개 값, 월요일부터],
+            "monthly": [12개 값, 1월부터]
+        }
+
+    각 배열은 평균이 1이 되도록 정규화하므로 상대적인 모양만 의미가 있다. 빠진 키는 균등(1.0)으로 본다.
+    어떤 시각의 강도 = hourly[시] × weekday[요일] × monthly[월]
+    """
+
+    SHAPES = {'hourly': 24, 'weekday': 7, 'monthly': 12}
+
+    def __init__(self, hourly=None, weekday=None, monthly=None):
+        self.hourly = self._normalize('hourly', hourly)
+        self.weekday = self._normalize('weekday', weekday)
+        self.monthly = self._normalize('monthly', monthly)
+
+    @classmethod
+    def _normalize(cls, name, values):
+        size = cls.SHAPES[name]
+        if values is None:
+            return np.ones(size)
+        values = np.asarray(values, dtype=np.float64)
+        if values.shape != (size,):
+            raise ValueError(f"부하 프로파일 '{name}'은 {size}개 값이어야 합니다. (현재 {values.size}개)")
+        if not np.isfinite(values).all() or (values < 0).any() or values.sum() <= 0:
+            raise ValueError(f"부하 프로파일 '{name}'에 음수/NaN 값이 있거나 합이 0입니다.")
+        return values / values.mean()
+
+    @classmethod
+    def load(cls, profile):
+        """JSON 파일 경로, dict, LoadProfile 중 하나로 프로파일 구성"""
+        if isinstance(profile, cls):
+            return profile
+        if isinstance(profile, str):
+            with open(profile, encoding='utf-8') as f:
+                profile = json.load(f)
+        unknown = set(profile) - set(cls.SHAPES)
+        if unknown:
+            raise ValueError(f"알 수 없는 부하 프로파일 키: {sorted(unknown)}")
+        return cls(**profile)
+
+    def hour_weights(self, hours):
+        """datetime64[h] 배열 → 시각별 강도 배수"""
+        hour_of_day = hours.astype(np.int64) % 24
+        days = hours.astype('datetime64[D]').astype(np.int64)
+        weekday = (days + 3) % 7  # 1970-01-01은 목요일 (월요일 = 0)
+        month = hours.astype('datetime64[M]').astype(np.int64) % 12
+        return self.hourly[hour_of_day] * self.weekday[weekday] * self.monthly[month]
+
+# ----------------------------------------------------
+# 2. 비균질 포아송 과정 세션 도착 스케줄러
+# ----------------------------------------------------
+class ArrivalScheduler:
+    """
+    [start, end) 기간의 세션 시작 시각을 시간당 강도가 일정한(piecewise-constant) 비균질 포아송 과정으로 만든다.
+
+    - 시간 구간별 세션 수: total_sessions가 있으면 강도 비례 다항분포(총합 고정),
+      없으면 sessions_per_day × 강도 / 24를 평균으로 하는 포아송 분포.
+      시간 구간 수(2년이면 약 17,520개)만큼의 정수 배열만 메모리에 둔다.
+    - 구간 안의 시각: 날짜별로 독립된 시드(SeedSequence(seed, spawn_key=(날짜 번호,)))로 균등 추출 후 정렬.
+
+    세션 i는 시간 순서로 i번째 세션이며, start_times(first, last)는 그 구간이 걸친 날짜만 만들어
+    잘라 주므로 여러 해 범위도 청크 단위로 시간 순서대로 흘려보낼 수 있다.
+    같은 seed면 어떤 순서/어느 프로세스에서 요청해도 같은 시각이 나온다 (병렬 샤드와 무관).
+    """
+
+    def __init__(self, profile, start_date, end_date, seed=None, total_sessions=None, sessions_per_day=None):
+        if total_sessions is None and sessions_per_day is None:
+            raise ValueError("total_sessions 또는 sessions_per_day 중 하나는 지정해야 합니다.")
+        self.profile = LoadProfile.load(profile)
+        self.start_hour = np.datetime64(start_date, 'h')
+        self.end_hour = np.datetime64(end_date, 'h')
+        self.seed_sequence = np.random.SeedSequence(seed)
+
+        hours = np.arange(self.start_hour, self.end_hour, dtype='datetime64[h]')
+        weights = self.profile.hour_weights(hours)
+        count_rng = np.random.default_rng(self._child_seed('counts'))
+        if total_sessions is not None:
+            if len(hours) == 0 or weights.sum() <= 0:
+                self.hour_counts = np.zeros(len(hours), dtype=np.int64)
+            else:
+                self.hour_counts = count_rng.multinomial(total_sessions, weights / weights.sum()).astype(np.int64)
+        else:
+            self.hour_counts = count_rng.poisson(sessions_per_day / 24 * weights).astype(np.int64)
+        self.total_sessions = int(self.hour_counts.sum())
+
+        # 날짜(자정 기준) 경계: 날짜별 시간 구간 범위와 누적 세션 수
+        hour_index = hours.astype('datetime64[D]').astype(np.int64)
+        self.days, self._day_first_hour = np.unique(hour_index, return_index=True)
+        self._day_bounds = np.append(self._day_first_hour, len(hours))
+        day_counts = np.add.reduceat(self.hour_counts, self._day_first_hour) if len(hours) else np.zeros(0, np.int64)
+        self.session_offsets = np.concatenate([[0], np.cumsum(day_counts)]).astype(np.int64)
+        self._cached_day = None
+
+    def _child_seed(self, key):
+        key = (0,) if key == 'counts' else (1, key)
+        return np.random.SeedSequence(self.seed_sequence.entropy, spawn_key=key)
+
+    @property
+    def n_days(self):
+        return len(self.days)
+
+    def day_start_times(self, day):
+        """day번째 날짜의 세션 시작 시각 (epoch 초, float, 정렬됨)"""
+        if self._cached_day is not None and self._cached_day[0] == day:
+            return self._cached_day[1]
+        first_hour, last_hour = self._day_bounds[day], self._day_bounds[day + 1]
+        counts = self.hour_counts[first_hour:last_hour]
+        hour_starts = (self.start_hour + np.arange(first_hour, last_hour)).astype('datetime64[s]').astype(np.int64)
+        rng = np.random.default_rng(self._child_seed(int(self.days[day])))
+        times = np.repeat(hour_starts.astype(np.float64), counts) + rng.random(int(counts.sum())) * 3600.0
+        times.sort()
+        self._cached_day = (day, times)
+        return times
+
+    def start_times(self, first, last):
+        """시간 순서 기준 세션 [first, last)의 시작 시각 (epoch 초, float)"""
+        if last <= first:
+            return np.empty(0, dtype=np.float64)
+        first_day = int(np.searchsorted(self.session_offsets, first, side='right')) - 1
+        last_day = int(np.searchsorted(self.session_offsets, last, side='left'))
+        parts = [self.day_start_times(day) for day in range(first_day, last_day)]
+        times = np.concatenate(parts)
+        start = first - self.session_offsets[first_day]
+        return times[start:start + (last - first)]
+
+    def iter_chunks(self, first_day=0, last_day=None):
+        """날짜 단위로 세션 시작 시각 배열을 시간 순서대로 yield"""
+        last_day = self.n_days if last_day is None else last_day
+        for day in range(first_day, last_day):
+            yield self.day_start_times(day)
+
+    def day_shard_ranges(self, days_per_shard=1):
+        """
+        날짜 경계에 맞춘 세션 인덱스 [first, last) 구간 목록 (병렬 워커용 시간 샤드).
+        세션이 없는 구간은 건너뛴다.
+        """
+        ranges = []
+        for day in range(0, self.n_days, days_per_shard):
+            first = int(self.session_offsets[day])
+            last = int(self.session_offsets[min(day + days_per_shard, self.n_days)])
+            if last > first:
+                ranges.append((first, last))
+        return ranges
+
+
+def epoch_to_datetime(epoch_seconds):
+    """epoch 초 → naive datetime (마이크로초 단위)"""
+    return np.datetime64(int(round(epoch_seconds * 1e6)), 'us').astype(datetime)
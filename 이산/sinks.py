@@ -0,0 +1,403 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+from event_buffer import EventBuffer
+from user_state import ANONYMOUS_USER_ID
+
+# ----------------------------------------------------
+# 1. 이벤트 스키마 (properties를 평탄화한 고정 컬럼)
+# ----------------------------------------------------
+BASE_COLUMNS = ['event_name', 'session_id', 'user_id', 'timestamp', 'event_sequence']
+PROPERTY_COLUMNS = ['is_logged_in', 'time_spent_sec', 'item_id', 'item_title', 'item_price', 'item_category']
+EVENT_COLUMNS = BASE_COLUMNS + PROPERTY_COLUMNS
+
+# 컬럼별 논리 타입 (Parquet 등 타입이 있는 sink에서 사용)
+EVENT_SCHEMA = {
+    'event_name': 'string',
+    'session_id': 'string',
+    'user_id': 'int64',
+    'timestamp': 'string',
+    'event_sequence': 'int32',
+    'is_logged_in': 'bool',
+    'time_spent_sec': 'float64',
+    'item_id': 'string',
+    'item_title': 'string',
+    'item_price': 'int64',
+    'item_category': 'string',
+}
+
+# ----------------------------------------------------
+# 2. 청크 단위 sink
+# ----------------------------------------------------
+class EventSink:
+    """
+    이벤트를 chunk_rows개씩 모았다가 _write_chunk()로 내보내는 sink의 기본 클래스.
+    메모리에는 최대 chunk_rows개의 행만 유지된다.
+    """
+
+    def __init__(self, path, chunk_rows=100000):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.rows_written = 0
+        self._columns = self._empty_columns()
+        self._pending = 0
+
+    def _empty_columns(self):
+        return {name: [] for name in EVENT_COLUMNS}
+
+    def write_buffer(self, buffer):
+        """event_buffer.EventBuffer 블록 추가. 이벤트 이름/타임스탬프 등 문자열은 여기서 한 번에 만든다"""
+        if len(buffer):
+            self.write_columns(buffer.to_columns(), len(buffer))
+
+    def write_columns(self, columns, n_rows):
+        """이미 평탄화된 컬럼 청크(컬럼 → 값 리스트)를 추가"""
+        for name in EVENT_COLUMNS:
+            self._columns[name].extend(columns[name])
+        self._pending += n_rows
+        if self._pending >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self._write_chunk(self._columns, self._pending)
+            self.rows_written += self._pending
+            self._columns = self._empty_columns()
+            self._pending = 0
+
+    def close(self):
+        self.flush()
+        self._close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _write_chunk(self, columns, n_rows):
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+
+class CsvSink(EventSink):
+    """평탄화된 이벤트를 CSV로 기록 (헤더는 파일 생성 시 한 번)"""
+
+    def __init__(self, path, chunk_rows=100000, encoding='utf-8-sig'):
+        super().__init__(path, chunk_rows)
+        self._file = open(path, 'w', newline='', encoding=encoding)
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(EVENT_COLUMNS)
+
+    def _write_chunk(self, columns, n_rows):
+        self._writer.writerows(zip(*(columns[name] for name in EVENT_COLUMNS)))
+
+    def _close(self):
+        self._file.close()
+
+
+class JsonlSink(EventSink):
+    """평탄화된 이벤트를 한 줄에 하나씩 JSON으로 기록"""
+
+    def __init__(self, path, chunk_rows=100000):
+        super().__init__(path, chunk_rows)
+        self._file = open(path, 'w', encoding='utf-8')
+
+    def _write_chunk(self, columns, n_rows):
+        values = [columns[name] for name in EVENT_COLUMNS]
+        lines = [
+            json.dumps(dict(zip(EVENT_COLUMNS, row)), ensure_ascii=False, default=_json_default)
+            for row in zip(*values)
+        ]
+        self._file.write('\n'.join(lines) + '\n')
+
+    def _close(self):
+        self._file.close()
+
+
+class ParquetSink(EventSink):
+    """고정 스키마 Parquet 파일에 청크마다 row group 하나씩 기록 (pyarrow 필요)"""
+
+    def __init__(self, path, chunk_rows=100000, user_id_type='int64'):
+        super().__init__(path, chunk_rows)
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._pa = pa
+        schema = dict(EVENT_SCHEMA, user_id=user_id_type)
+        self.schema = pa.schema([(name, pa.type_for_alias(schema[name])) for name in EVENT_COLUMNS])
+        self._writer = pq.ParquetWriter(path, self.schema)
+
+    def _write_chunk(self, columns, n_rows):
+        table = self._pa.Table.from_pydict(
+            {name: _native(columns[name]) for name in EVENT_COLUMNS}, schema=self.schema
+        )
+        self._writer.write_table(table)
+
+    def _close(self):
+        self._writer.close()
+
+
+class PartitionedParquetSink(EventSink):
+    """
+    분석용 컬럼형 출력. root 아래에 날짜(및 선택적으로 user_id 해시 버킷)별 디렉터리로 나눠
+    Parquet row group을 점진적으로 기록한다 (pyarrow 필요).
+
+        root/date=2024-01-01/[user_bucket=3/]part-00000.parquet
+
+    - event_name / session_id / user_id: dictionary 인코딩
+    - timestamp: timestamp[us] 타입
+    - item_*: properties를 평탄화한 개별 컬럼
+    파티션별로 row_group_rows개가 모일 때마다 row group 하나를 쓴다.
+    열린 파티션은 max_open_files개까지 유지하고, 초과하면 가장 오래 안 쓴 파티션을 flush 후 닫는다
+    (같은 파티션에 다시 쓰면 다음 part 파일이 생긴다).
+    """
+
+    DICTIONARY_COLUMNS = ('event_name', 'session_id', 'user_id')
+
+    def __init__(self, root, chunk_rows=100000, user_buckets=0, user_id_type='int64', max_open_files=32,
+                 row_group_rows=100000):
+        super().__init__(root, chunk_rows)
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._pa = pa
+        self._pq = pq
+        self.user_buckets = user_buckets
+        self.max_open_files = max_open_files
+        self.row_group_rows = row_group_rows
+
+        schema = dict(EVENT_SCHEMA, user_id=user_id_type)
+        self._input_schema = pa.schema([(name, pa.type_for_alias(schema[name])) for name in EVENT_COLUMNS])
+        fields = []
+        for name in EVENT_COLUMNS:
+            value_type = pa.type_for_alias(schema[name])
+            if name in self.DICTIONARY_COLUMNS:
+                value_type = pa.dictionary(pa.int32(), value_type)
+            elif name == 'timestamp':
+                value_type = pa.timestamp('us')
+            fields.append((name, value_type))
+        self.schema = pa.schema(fields)
+
+        self._writers = OrderedDict()  # 파티션 경로 → ParquetWriter (LRU)
+        self._buffers = {}             # 파티션 경로 → 아직 쓰지 않은 테이블 조각
+        self._part_counts = {}
+        os.makedirs(root, exist_ok=True)
+
+    def _partition_key(self, timestamp, user_id):
+        key = f"date={timestamp[:10]}"
+        if self.user_buckets:
+            bucket = user_id % self.user_buckets if isinstance(user_id, int) else zlib.crc32(str(user_id).encode()) % self.user_buckets
+            key = os.path.join(key, f"user_bucket={bucket}")
+        return key
+
+    def _write_chunk(self, columns, n_rows):
+        pa = self._pa
+        user_ids = _native(columns['user_id'])
+        table = pa.Table.from_pydict(
+            {name: (user_ids if name == 'user_id' else _native(columns[name])) for name in EVENT_COLUMNS},
+            schema=self._input_schema,
+        )
+        arrays = []
+        for name in EVENT_COLUMNS:
+            column = table.column(name)
+            if name in self.DICTIONARY_COLUMNS:
+                column = column.dictionary_encode()
+            elif name == 'timestamp':
+                column = column.cast(pa.timestamp('us'))
+            arrays.append(column)
+        table = pa.Table.from_arrays(arrays, schema=self.schema)
+
+        partitions = {}
+        for i, (timestamp, user_id) in enumerate(zip(columns['timestamp'], user_ids)):
+            partitions.setdefault(self._partition_key(timestamp, user_id), []).append(i)
+        for key, rows in partitions.items():
+            part = table if len(rows) == n_rows else table.take(pa.array(rows))
+            self._open_partition(key)
+            buffered = self._buffers[key]
+            buffered.append(part)
+            if sum(t.num_rows for t in buffered) >= self.row_group_rows:
+                self._flush_partition(key)
+
+    def _open_partition(self, key):
+        if key in self._writers:
+            self._writers.move_to_end(key)
+            return
+        if len(self._writers) >= self.max_open_files:
+            oldest = next(iter(self._writers))
+            self._flush_partition(oldest)
+            self._writers.pop(oldest).close()
+            del self._buffers[oldest]
+        directory = os.path.join(self.path, key)
+        os.makedirs(directory, exist_ok=True)
+        part = self._part_counts.get(key, 0)
+        self._part_counts[key] = part + 1
+        self._writers[key] = self._pq.ParquetWriter(os.path.join(directory, f"part-{part:05d}.parquet"), self.schema)
+        self._buffers[key] = []
+
+    def _flush_partition(self, key):
+        buffered = self._buffers[key]
+        if buffered:
+            table = self._pa.concat_tables(buffered).unify_dictionaries()
+            self._writers[key].write_table(table.combine_chunks())
+            buffered.clear()
+
+    def _close(self):
+        for key, writer in self._writers.items():
+            self._flush_partition(key)
+            writer.close()
+        self._writers.clear()
+        self._buffers.clear()
+
+
+class UserSortedSink(EventSink):
+    """
+    user_id → timestamp 순서로 정렬된 출력을 전체 로그를 메모리에 올리지 않고 만드는 sink.
+
+    생성 중에는 EventBuffer 블록의 정수 배열(user_id, epoch ms 타임스탬프, 이벤트 코드 등)을 묶은
+    레코드 배열과 session_id 배열을 spill 키별 파일에 np.save로 이어 쓰고, close() 때 키 순서대로 하나씩 읽어
+    (user_id, timestamp_ms) 정수 키로 np.lexsort한 뒤 target sink에 넘긴다 (문자열은 이때 만든다).
+
+        spill 키 = (날짜, 0, 시간 조각)   익명 세션(user_id 0): 타임스탬프 구간(1일/7일)으로 나눔
+                   (날짜, 1, user 버킷)   그 외: user_id 범위 버킷 n_buckets개
+
+    키 순서대로 이어 쓰면 전체가 정렬되고, 한 번에 메모리에 올라가는 양은 spill 파일 하나다.
+    익명 이벤트는 모두 같은 user_id라 시간 구간으로 나눠 한 버킷에 몰리지 않게 한다.
+    target이 날짜 파티션 sink(PartitionedParquetSink)이면 날짜를 먼저 나누므로(partition_by_date)
+    각 파티션 안이 (user_id, timestamp) 순서가 되고 파티션마다 part 파일이 하나만 생긴다.
+    이때 버킷은 날짜마다 n_buckets개다. 정렬은 안정 정렬이라 같은 시각의 이벤트는 생성 순서를 유지한다.
+    write_buffer()로 받은 블록만 지원한다.
+    """
+
+    SPILL_DTYPE = np.dtype([
+        ('user_id', np.int64), ('timestamp_ms', np.int64), ('event_code', np.int16), ('event_sequence', np.int32),
+        ('is_logged_in', np.int8), ('time_spent_sec', np.float64), ('item', np.int64),
+    ])
+
+    def __init__(self, target, max_user_id, n_buckets=None, spill_dir=None, chunk_rows=100000, partition_by_date=None):
+        super().__init__(target.path, chunk_rows)
+        self.target = target
+        self.partition_by_date = isinstance(target, PartitionedParquetSink) if partition_by_date is None else partition_by_date
+        self.n_buckets = n_buckets or (8 if self.partition_by_date else 64)
+        # 익명 이벤트 시간 조각: 날짜 파티션이면 날짜마다 1개, 아니면 7일 단위
+        self.anonymous_slice_ms = 86400000 if self.partition_by_date else 7 * 86400000
+        self.max_user_id = int(max_user_id)
+        self._own_spill_dir = spill_dir is None
+        self.spill_dir = tempfile.mkdtemp(prefix='synthetic_spill_') if spill_dir is None else spill_dir
+        os.makedirs(self.spill_dir, exist_ok=True)
+        self._spill_paths = {}  # spill 키 → 파일 경로
+        self._event_names = None
+        self._catalog = None
+
+    def _bucket_of(self, user_ids):
+        if user_ids.dtype.kind not in 'iu':
+            raise ValueError("UserSortedSink는 정수 user_id만 지원합니다.")
+        user_ids = user_ids.astype(np.int64)
+        return np.clip(user_ids * self.n_buckets // (self.max_user_id + 1), 0, self.n_buckets - 1)
+
+    def _spill_keys(self, user_ids, timestamp_ms):
+        """이벤트별 spill 키 (날짜, 익명 여부, 시간 조각/버킷)를 순서가 같은 int64 하나로 묶은 배열"""
+        known = user_ids != ANONYMOUS_USER_ID
+        day = timestamp_ms // 86400000 if self.partition_by_date else 0
+        part = np.where(known, self._bucket_of(user_ids), timestamp_ms // self.anonymous_slice_ms)
+        return (day << 40) | (known.astype(np.int64) << 39) | part
+
+    @staticmethod
+    def _split_key(key):
+        return key >> 40, key >> 39 & 1, key & (1 << 39) - 1
+
+    def write_buffer(self, buffer):
+        if not len(buffer):
+            return
+        if self._event_names is None:
+            self._event_names, self._catalog = buffer.event_names, buffer.catalog
+        session_user_ids = np.asarray(buffer.session_user_ids)
+        if session_user_ids.dtype.kind not in 'iu':
+            raise ValueError("UserSortedSink는 정수 user_id만 지원합니다.")
+        records = np.empty(len(buffer), dtype=self.SPILL_DTYPE)
+        records['user_id'] = session_user_ids[buffer.session]
+        for name in EventBuffer.ARRAY_FIELDS[1:]:
+            records[name] = getattr(buffer, name)
+        session_ids = np.asarray(buffer.session_ids, dtype=str)[buffer.session]
+        keys = self._spill_keys(records['user_id'], records['timestamp_ms'])
+        order = np.argsort(keys, kind='stable')
+        unique_keys, starts = np.unique(keys[order], return_index=True)
+        bounds = np.append(starts, len(keys))
+        for k, key in enumerate(unique_keys.tolist()):
+            rows = order[bounds[k]:bounds[k + 1]]
+            path = self._spill_paths.get(key)
+            if path is None:
+                path = os.path.join(self.spill_dir, 'spill-{}-{}-{}.npy'.format(*self._split_key(key)))
+                self._spill_paths[key] = path
+            with open(path, 'ab') as f:
+                np.save(f, records[rows], allow_pickle=False)
+                np.save(f, session_ids[rows], allow_pickle=False)
+
+    def write_columns(self, columns, n_rows):
+        raise TypeError("UserSortedSink는 EventBuffer 블록(write_buffer)만 받습니다.")
+
+    def _close(self):
+        try:
+            for key in sorted(self._spill_paths):
+                path = self._spill_paths[key]
+                records, session_ids = self._read_spill(path)
+                order = np.lexsort((records['timestamp_ms'], records['user_id']))
+                for start in range(0, len(order), self.chunk_rows):
+                    rows = order[start:start + self.chunk_rows]
+                    self.target.write_buffer(self._sorted_buffer(records[rows], session_ids[rows]))
+                self.rows_written += len(order)
+                os.remove(path)
+        finally:
+            self.target.close()
+            if self._own_spill_dir:
+                shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    def _sorted_buffer(self, records, event_session_ids):
+        """정렬된 spill 레코드로 target에 넘길 EventBuffer 구성"""
+        session_ids, session = np.unique(event_session_ids, return_inverse=True)
+        session_user_ids = np.empty(len(session_ids), dtype=np.int64)
+        session_user_ids[session] = records['user_id']
+        return EventBuffer(
+            self._event_names, self._catalog, session_ids.tolist(), session_user_ids,
+            session.reshape(-1).astype(np.int32),
+            *(np.ascontiguousarray(records[name]) for name in EventBuffer.ARRAY_FIELDS[1:]),
+        )
+
+    @staticmethod
+    def _read_spill(path):
+        records, session_ids = [], []
+        with open(path, 'rb') as f:
+            while f.peek(1):  # 블록마다 (레코드 배열, session_id 배열) 순서로 이어 씀
+                records.append(np.load(f, allow_pickle=False))
+                session_ids.append(np.load(f, allow_pickle=False))
+        return np.concatenate(records), np.concatenate(session_ids)
+
+
+SINKS = {'csv': CsvSink, 'jsonl': JsonlSink, 'parquet': ParquetSink, 'parquet_partitioned': PartitionedParquetSink}
+
+
+def open_sink(output_format, path, **kwargs):
+    """형식 이름('csv' / 'jsonl' / 'parquet' / 'parquet_partitioned')으로 sink 생성"""
+    try:
+        sink_class = SINKS[output_format]
+    except KeyError:
+        raise ValueError(f"알 수 없는 출력 형식 '{output_format}' ({', '.join(SINKS)})") from None
+    return sink_class(path, **kwargs)
+
+
+def _native(values):
+    """numpy 스칼라를 파이썬 기본 타입으로 변환"""
+    return [v.item() if hasattr(v, 'item') else v for v in values]
+
+
+def _json_default(obj):
+    if hasattr(obj, 'item'):
+        return obj.item()
+    raise TypeError(f'Object of type {obj.__class__.__name__} is not JSON serializable')
@@ -0,0 +1,217 @@
+import os
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from event_buffer import EVENT_DROP_OFF, EVENT_RECONNECT, EVENT_VIEW_MAIN_PAGE, RULE_EVENT_BASE
+from user_state import ANONYMOUS_USER_ID
+
+# ----------------------------------------------------
+# 1. 세션 요약 스키마
+# ----------------------------------------------------
+SUMMARY_COLUMNS = [
+    'session_id', 'user_id', 'start_time', 'end_time', 'session_length_sec',
+    'event_count', 'page_view_count', 'action_count', 'drop_off_count', 'reconnect_count',
+    'purchase_count', 'purchased_item_count', 'purchase_amount',
+    'is_new_user', 'is_anonymous', 'traffic_source',
+]
+
+# 일/주 단위 롤업에서 합산하는 값
+ROLLUP_SUMS = [
+    'sessions', 'new_user_sessions', 'anonymous_sessions', 'purchase_sessions', 'events', 'page_views', 'actions',
+    'purchases', 'purchased_items', 'purchase_amount', 'session_length_sec',
+]
+
+# ----------------------------------------------------
+# 2. 생성 중 세션 요약 집계
+# ----------------------------------------------------
+class SessionSummarizer:
+    """
+    생성된 EventBuffer 블록을 sink로 보내기 전에 바로 세션 요약 행으로 집계한다.
+    이벤트 로그를 다시 읽거나 전체 groupby를 하지 않으며, 블록마다 bincount/searchsorted 같은
+    벡터 연산만 쓰므로 이벤트당 비용이 O(1)이다.
+
+    - 페이지뷰: View Main Page + 페이지(규칙) 이벤트, 유저 액션: drop-off가 아닌 페이지 이벤트
+    - 구매: Config.PURCHASE_RULES 페이지 이벤트 수, 책이 있는 구매의 가격 합
+      (drop-off 후 재접속하면 같은 페이지 이벤트가 다시 나오므로 Reconnect_Session 직후 이벤트는 제외)
+    - 신규/기존: 엔진이 세션 시작 시 유저 상태(UserStateStore.session_count)가 0이었던 세션에 표시한
+      EventBuffer.session_is_new를 그대로 쓴다 (익명 세션은 항상 신규 아님). 병렬 생성에서는 같은 상태 주기의
+      다른 샤드 세션이 보이지 않으므로 한 주기 안 여러 샤드에서 같은 유저가 신규로 집계될 수 있다.
+    - 유입 경로: session_id의 crc32로 Config.TRAFFIC_SOURCE_RATIO 비율에 맞춰 결정
+      (난수를 쓰지 않으므로 이벤트 출력에 영향이 없고 같은 세션은 항상 같은 경로)
+
+    path를 주면 요약 행을 청크마다 CSV/Parquet(확장자로 판단)으로 이어 쓰고,
+    rollups=True면 날짜별 합계를 모아 daily()/weekly()로 돌려준다.
+    """
+
+    def __init__(self, generator, path=None, rollups=True):
+        config = generator.config
+        t = generator.transitions
+        self.path = path
+        self.rollups = rollups
+        self.sessions_written = 0
+
+        purchase_rules = [t.rule_id[name] for name in config.PURCHASE_RULES if name in t.rule_id]
+        self._purchase_codes = np.array([RULE_EVENT_BASE + r for r in purchase_rules], dtype=np.int16)
+        prices = generator.catalog.prices
+        self._prices = None if prices is None else pd.to_numeric(pd.Series(np.asarray(prices)), errors='coerce').fillna(0).to_numpy()
+
+        self.traffic_sources = list(config.TRAFFIC_SOURCE_RATIO)
+        ratios = np.array(list(config.TRAFFIC_SOURCE_RATIO.values()), dtype=np.float64)
+        self._traffic_cumulative = np.cumsum(ratios) / ratios.sum()
+        self._daily = {}
+        self._writer = None
+
+    # --- 집계 ----------------------------------------------------------------
+    def add(self, buffer):
+        """EventBuffer 블록 하나를 세션 요약 DataFrame으로 집계 (path가 있으면 기록)"""
+        n_sessions = len(buffer.session_ids)
+        session = buffer.session
+        if n_sessions == 0 or len(session) == 0:
+            return pd.DataFrame(columns=SUMMARY_COLUMNS)
+        code = buffer.event_code
+
+        # 블록 안 이벤트는 세션 → event_sequence 순서이므로 세션별 첫/마지막 이벤트 위치를 바로 구할 수 있다
+        sessions = np.arange(n_sessions)
+        first = np.searchsorted(session, sessions, side='left')
+        last = np.searchsorted(session, sessions, side='right') - 1
+        start_ms = buffer.timestamp_ms[first]
+        end_ms = buffer.timestamp_ms[last]
+
+        def count(mask):
+            return np.bincount(session[mask], minlength=n_sessions)
+
+        page_event = code >= RULE_EVENT_BASE
+        drop_off = code == EVENT_DROP_OFF
+        # 재접속 직후 이벤트: 이탈한 페이지를 다시 보여주는 것이므로 구매를 한 번 더 세지 않는다
+        after_reconnect = np.zeros(len(code), dtype=bool)
+        after_reconnect[1:] = (code[:-1] == EVENT_RECONNECT) & (session[1:] == session[:-1])
+        purchase = np.isin(code, self._purchase_codes) & ~after_reconnect
+        purchased_item = purchase & (buffer.item >= 0)
+        if self._prices is not None and purchased_item.any():
+            purchase_amount = np.bincount(session[purchased_item], weights=self._prices[buffer.item[purchased_item]],
+                                          minlength=n_sessions)
+        else:
+            purchase_amount = np.zeros(n_sessions)
+        drop_offs = count(drop_off)
+
+        user_ids = np.asarray(buffer.session_user_ids)
+        anonymous = user_ids == ANONYMOUS_USER_ID
+        summary = pd.DataFrame({
+            'session_id': buffer.session_ids,
+            'user_id': user_ids,
+            'start_time': np.datetime_as_string(start_ms.astype('datetime64[ms]'), unit='ms'),
+            'end_time': np.datetime_as_string(end_ms.astype('datetime64[ms]'), unit='ms'),
+            'session_length_sec': (end_ms - start_ms) / 1000.0,
+            'event_count': np.bincount(session, minlength=n_sessions),
+            'page_view_count': count(page_event | (code == EVENT_VIEW_MAIN_PAGE)),
+            'action_count': count(page_event) - drop_offs,
+            'drop_off_count': drop_offs,
+            'reconnect_count': count(code == EVENT_RECONNECT),
+            'purchase_count': count(purchase),
+            'purchased_item_count': count(purchased_item),
+            'purchase_amount': purchase_amount.round().astype(np.int64),
+            'is_new_user': np.asarray(buffer.session_is_new, dtype=bool) & ~anonymous,
+            'is_anonymous': anonymous,
+            'traffic_source': self._traffic_source(buffer.session_ids),
+        })
+
+        if self.rollups:
+            self._accumulate_daily(summary, start_ms)
+        if self.path:
+            self._write(summary)
+        self.sessions_written += n_sessions
+        return summary
+
+    def _traffic_source(self, session_ids):
+        hashes = np.array([zlib.crc32(s.encode()) for s in session_ids], dtype=np.float64) / 2 ** 32
+        index = np.searchsorted(self._traffic_cumulative, hashes, side='right')
+        return pd.Categorical.from_codes(np.minimum(index, len(self.traffic_sources) - 1), categories=self.traffic_sources)
+
+    # --- 롤업 ----------------------------------------------------------------
+    def _accumulate_daily(self, summary, start_ms):
+        days = start_ms.astype('datetime64[ms]').astype('datetime64[D]')
+        values = pd.DataFrame({
+            'date': days,
+            'sessions': 1,
+            'new_user_sessions': summary['is_new_user'].to_numpy().astype(np.int64),
+            'anonymous_sessions': summary['is_anonymous'].to_numpy().astype(np.int64),
+            'purchase_sessions': (summary['purchase_count'] > 0).astype(np.int64),
+            'events': summary['event_count'],
+            'page_views': summary['page_view_count'],
+            'actions': summary['action_count'],
+            'purchases': summary['purchase_count'],
+            'purchased_items': summary['purchased_item_count'],
+            'purchase_amount': summary['purchase_amount'],
+            'session_length_sec': summary['session_length_sec'],
+        })
+        for source in self.traffic_sources:
+            values[f"sessions_{source}"] = (summary['traffic_source'] == source).to_numpy().astype(np.int64)
+        for day, sums in values.groupby('date').sum().iterrows():
+            if day in self._daily:
+                self._daily[day] += sums.to_numpy()
+            else:
+                # copy-on-write(pandas 3)에서는 to_numpy()가 읽기 전용 뷰라 다음 블록의 += 가 실패하므로 복사본 저장
+                self._daily[day] = sums.to_numpy(dtype=np.float64, copy=True)
+        self._rollup_columns = [c for c in values.columns if c != 'date']
+
+    def daily(self):
+        """날짜별 롤업 (합계 + 평균 세션 길이/세션당 페이지뷰/구매 전환율)"""
+        if not self._daily:
+            return pd.DataFrame()
+        days = sorted(self._daily)
+        rollup = pd.DataFrame([self._daily[d] for d in days], columns=self._rollup_columns)
+        rollup.insert(0, 'date', pd.to_datetime(days))
+        return _with_rates(rollup)
+
+    def weekly(self):
+        """주(월요일 시작)별 롤업"""
+        daily = self.daily()
+        if daily.empty:
+            return daily
+        week = daily['date'] - pd.to_timedelta(daily['date'].dt.weekday, unit='D')
+        sums = daily.drop(columns='date').groupby(week.rename('week_start'))[self._rollup_columns].sum().reset_index()
+        return _with_rates(sums)
+
+    # --- 기록 ----------------------------------------------------------------
+    def _write(self, summary):
+        if self.path.endswith('.parquet'):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(summary, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table.cast(self._writer.schema))
+        else:
+            summary.to_csv(self.path, mode='a' if self.sessions_written else 'w', header=not self.sessions_written,
+                           index=False, encoding='utf-8-sig' if not self.sessions_written else 'utf-8')
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def write_rollups(self, directory):
+        """daily/weekly 롤업을 directory에 CSV로 저장"""
+        os.makedirs(directory, exist_ok=True)
+        self.daily().to_csv(os.path.join(directory, 'daily_summary.csv'), index=False, encoding='utf-8-sig')
+        self.weekly().to_csv(os.path.join(directory, 'weekly_summary.csv'), index=False, encoding='utf-8-sig')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _with_rates(rollup):
+    """합계 컬럼을 정수로 되돌리고 세션당 비율 컬럼을 덧붙인다"""
+    for column in ROLLUP_SUMS + [c for c in rollup.columns if c.startswith('sessions_')]:
+        if column in rollup.columns and column != 'session_length_sec':
+            rollup[column] = rollup[column].astype(np.int64)
+    sessions = rollup['sessions'].replace(0, np.nan)
+    rollup['avg_session_length_sec'] = (rollup['session_length_sec'] / sessions).round(2)
+    rollup['page_views_per_session'] = (rollup['page_views'] / sessions).round(2)
+    rollup['conversion_rate'] = (rollup['purchase_sessions'] / sessions).round(4)
+    return rollup
@@ -0,0 +1,53 @@
+import os
+import sys
+
+import pytest
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PACKAGE_DIR)
+
+BOOK_DB_PATH = os.path.join(PACKAGE_DIR, 'BDB', 'biblio_data_with_weights.csv')
+
+
+@pytest.fixture(scope='session')
+def user_pool_path(tmp_path_factory):
+    """테스트용 작은 사용자 풀 (CSV + Parquet)"""
+    import user_pool
+
+    path = str(tmp_path_factory.mktemp('pool') / 'user_pool.csv')
+    user_pool.save_user_pool(user_pool.build_user_pool(user_pool.Config(), 3000, seed=7), path)
+    return path
+
+
+def settings_for(user_pool_path, input=None, config=None, output=None):
+    """테스트 기본 실행 설정 (14일, 600세션, seed 고정)"""
+    return {
+        'paths': {'book_db': BOOK_DB_PATH, 'user_pool': user_pool_path},
+        'input': dict({'start_date': '2024-01-01', 'end_date': '2024-01-15', 'total_sessions': 600,
+                       'users_to_sample': 500, 'seed': 11}, **(input or {})),
+        'config': config or {},
+        'output': output or {},
+    }
+
+
+@pytest.fixture
+def make_generator(user_pool_path):
+    """기본 실행 설정(input/config 덮어쓰기)으로 SyntheticDataGenerator를 만드는 함수"""
+    from cli import DEFAULT_SETTINGS, build_generator, merge_settings
+
+    def _make_generator(input=None, config=None):
+        return build_generator(merge_settings(DEFAULT_SETTINGS, settings_for(user_pool_path, input, config)))
+
+    return _make_generator
+
+
+@pytest.fixture
+def generate(tmp_path, user_pool_path):
+    """cli.run()으로 이벤트를 생성하고 결과 dict를 반환하는 함수 (input/config/output 섹션을 덮어쓴다)"""
+    from cli import run
+
+    def _generate(name='events.csv', input=None, config=None, output=None):
+        output = dict({'format': 'csv', 'path': str(tmp_path / name)}, **(output or {}))
+        return run(settings_for(user_pool_path, input, config, output))
+
+    return _generate
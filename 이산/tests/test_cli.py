@@ -0,0 +1,28 @@
+import pytest
+
+from cli import DEFAULT_SETTINGS, merge_settings, parse_args, settings_from_args, validate_settings
+
+DATES = ['--start-date', '2024-01-01', '--end-date', '2024-02-01']
+
+
+def settings_for(*argv):
+    return validate_settings(settings_from_args(parse_args([*DATES, *argv])))
+
+
+def test_set_values_are_checked_against_config_types():
+    assert settings_for('--set', 'RECONNECT_PROB=1')['config']['RECONNECT_PROB'] == 1.0
+    with pytest.raises(ValueError, match='RECONNECT_PROB'):
+        settings_for('--set', 'RECONNECT_PROB=abc')
+    with pytest.raises(ValueError, match='SCALAR_BLOCK_SESSIONS'):
+        settings_for('--set', 'SCALAR_BLOCK_SESSIONS=2.5')
+    with pytest.raises(ValueError, match='PROB_SEARCH'):
+        settings_for('--set', 'PROB_SEARCH=3')
+
+
+def test_sessions_per_day_requires_load_profile():
+    with pytest.raises(ValueError, match='load_profile'):
+        settings_for('--sessions-per-day', '100')
+    settings = merge_settings(DEFAULT_SETTINGS, {'input': {
+        'start_date': '2024-01-01', 'end_date': '2024-02-01', 'sessions_per_day': 100, 'load_profile': 'load_profile.json',
+    }})
+    assert validate_settings(settings)['input']['sessions_per_day'] == 100
@@ -0,0 +1,121 @@
+import os
+
+import pandas as pd
+import pytest
+
+from user_state import ANONYMOUS_USER_ID
+
+PURCHASE_EVENTS = ['PROB_PURCHASE_CLEAR', 'PROB_ACTION_AFTER_ADD_TO_CART', 'PROB_ACTION_AFTER_VIEW_CART',
+                   'PROB_BARO_SHOP', 'PROB_BARO_PURCHASE', 'PROB_PURCHASE']
+
+
+@pytest.mark.parametrize('engine', ['scalar', 'batch'])
+def test_anonymous_sessions_never_purchase(generate, engine):
+    result = generate(input={'engine': engine}, config={'ANONYMOUS_SESSION_RATIO': 0.5})
+    events = pd.read_csv(result['output'])
+    anonymous = events[events['user_id'] == ANONYMOUS_USER_ID]
+    assert len(anonymous) > 0
+    assert not anonymous['event_name'].isin(PURCHASE_EVENTS).any()
+    assert events.loc[events['event_name'] == 'PROB_PURCHASE_CLEAR', 'user_id'].ne(ANONYMOUS_USER_ID).all()
+
+
+def read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('engine', ['scalar', 'batch'])
+def test_parallel_output_does_not_depend_on_worker_count(generate, engine):
+    input = {'engine': engine, 'shard_size': 150, 'batch_size': 100}
+    single = generate('single.csv', input=dict(input, workers=1))
+    multi = generate('multi.csv', input=dict(input, workers=3))
+    assert single['rows'] == multi['rows'] > 0
+    assert read_bytes(single['output']) == read_bytes(multi['output'])
+
+
+class Interrupted(Exception):
+    pass
+
+
+def test_resumed_checkpoint_matches_uninterrupted_run(tmp_path, make_generator, monkeypatch):
+    from checkpoint import CheckpointedRun
+
+    def chunk_files(root):
+        return {name: read_bytes(root / name) for name in sorted(os.listdir(root)) if name.startswith('chunk-')}
+
+    CheckpointedRun(make_generator(), str(tmp_path / 'full'), checkpoint_sessions=100).run()
+
+    # 세 번째 chunk를 쓴 직후(체크포인트 기록 전) 중단
+    commit = CheckpointedRun._commit
+    calls = []
+
+    def interrupting_commit(self, rows):
+        calls.append(rows)
+        if len(calls) == 3:
+            raise Interrupted
+        commit(self, rows)
+
+    monkeypatch.setattr(CheckpointedRun, '_commit', interrupting_commit)
+    with pytest.raises(Interrupted):
+        CheckpointedRun(make_generator(), str(tmp_path / 'resumed'), checkpoint_sessions=100).run()
+    monkeypatch.setattr(CheckpointedRun, '_commit', commit)
+    CheckpointedRun(make_generator(), str(tmp_path / 'resumed'), checkpoint_sessions=100).run()
+
+    full = chunk_files(tmp_path / 'full')
+    assert len(full) == 6
+    assert chunk_files(tmp_path / 'resumed') == full
+
+
+def assert_user_time_order(events):
+    key = events[['user_id', 'timestamp']].apply(tuple, axis=1).tolist()
+    assert key == sorted(key)
+
+
+@pytest.mark.parametrize('engine', ['scalar', 'batch'])
+def test_sort_by_user_orders_rows_by_user_and_time(generate, engine):
+    input = {'engine': engine}
+    config = {'ANONYMOUS_SESSION_RATIO': 0.1}
+    unsorted = pd.read_csv(generate('events.csv', input=input, config=config)['output'])
+    result = generate('sorted.csv', input=input, config=config, output={'sort_by_user': True, 'chunk_rows': 1000})
+    events = pd.read_csv(result['output'])
+    assert result['rows'] == len(unsorted)
+    assert_user_time_order(events)
+    columns = list(events.columns)
+    assert events.sort_values(columns, ignore_index=True).equals(unsorted.sort_values(columns, ignore_index=True))
+
+
+def test_sort_by_user_keeps_one_file_per_date_partition(generate):
+    pytest.importorskip('pyarrow')
+    result = generate('partitioned', output={'format': 'parquet_partitioned', 'sort_by_user': True, 'chunk_rows': 500})
+    partitions = sorted(os.listdir(result['output']))
+    assert len(partitions) == 14
+    for partition in partitions:
+        files = os.listdir(os.path.join(result['output'], partition))
+        assert len(files) == 1
+        events = pd.read_parquet(os.path.join(result['output'], partition, files[0]))
+        events['user_id'] = events['user_id'].astype('int64')
+        assert_user_time_order(events)
+
+
+def test_summary_counts_purchase_once_after_reconnect(make_generator):
+    from event_buffer import (
+        EVENT_APP_LAUNCH, EVENT_DROP_OFF, EVENT_RECONNECT, EVENT_VIEW_MAIN_PAGE, RULE_EVENT_BASE, EventBufferBuilder,
+        event_names_for,
+    )
+    from summary import SessionSummarizer
+
+    generator = make_generator()
+    purchase_code = RULE_EVENT_BASE + generator.transitions.rule_id['PROB_PURCHASE_CLEAR']
+    builder = EventBufferBuilder(event_names_for(generator.transitions), generator.catalog)
+    session = builder.start_session('s20240101_00000001', 1, is_new=True)
+    codes = [EVENT_APP_LAUNCH, EVENT_VIEW_MAIN_PAGE, purchase_code, EVENT_DROP_OFF, EVENT_RECONNECT, purchase_code]
+    for sequence, code in enumerate(codes, start=1):
+        item = 0 if code == purchase_code else -1
+        builder.add(session, 1704067200000 + sequence * 1000, code, sequence, item=item)
+
+    summary = SessionSummarizer(generator, rollups=False).add(builder.finish())
+    row = summary.iloc[0]
+    assert row['purchase_count'] == 1
+    assert row['purchased_item_count'] == 1
+    assert row['reconnect_count'] == 1
+    assert bool(row['is_new_user'])
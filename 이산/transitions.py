@@ -0,0 +1,136 @@
+import math
+from itertools import accumulate
+
+import numpy as np
+
+# ----------------------------------------------------
+# 상태 전이표 컴파일러
+# ----------------------------------------------------
+PROB_TOLERANCE = 1e-6
+NO_RULE = -1  # drop-off처럼 다음 상태 규칙이 없는 행동
+
+
+class CompiledTransitions:
+    """
+    Config의 PROB_* 규칙을 정수 인덱스 기반 전이표로 컴파일한 결과.
+
+    - 규칙(상태) ID: rule_names[rule_id]
+    - 행동 ID: action_names[action_id]
+    - rule_actions[rule_id] / rule_cum_weights[rule_id]: 규칙별 행동 ID와 누적 확률
+      (random.choices와 같은 방식으로 만들어 같은 난수에 대해 같은 행동이 선택됨)
+    - next_rule[action_id][is_logged_in]: 행동 후 이동할 규칙 ID (drop-off는 NO_RULE)
+    - cum_matrix / action_matrix: 배치 엔진용 (규칙 수 x 최대 행동 수) 패딩 배열
+    """
+
+    def __init__(self, config):
+        rule_names = sorted(name for name in dir(config) if name.startswith('PROB_'))
+        rule_tables = {name: getattr(config, name) for name in rule_names}
+
+        errors = validate_rule_tables(config, rule_tables)
+        if errors:
+            raise ValueError("잘못된 상태 전이 설정:\n  - " + "\n  - ".join(errors))
+
+        self.rule_names = rule_names
+        self.rule_id = {name: i for i, name in enumerate(rule_names)}
+
+        action_names = []
+        for name in rule_names:
+            for action in rule_tables[name]:
+                if action not in action_names:
+                    action_names.append(action)
+        self.action_names = action_names
+        self.action_id = {name: i for i, name in enumerate(action_names)}
+
+        # 규칙별 행동 목록과 누적 확률
+        self.rule_actions = []
+        self.rule_cum_weights = []
+        self.rule_totals = []
+        for name in rule_names:
+            table = rule_tables[name]
+            cum_weights = list(accumulate(table.values()))
+            self.rule_actions.append([self.action_id[a] for a in table])
+            self.rule_cum_weights.append(cum_weights)
+            self.rule_totals.append(cum_weights[-1] + 0.0)
+
+        # 행동 → 다음 규칙 (로그인 여부별)
+        mainpage = (self.rule_id[config.MAINPAGE_RULES['not_login']], self.rule_id[config.MAINPAGE_RULES['login']])
+        self.mainpage_rule = mainpage
+        self.next_rule = []
+        for action in action_names:
+            target = config.ACTION_NEXT_RULE.get(action)
+            if action == config.DROP_OFF_ACTION:
+                self.next_rule.append((NO_RULE, NO_RULE))
+            elif target == 'MAINPAGE':
+                self.next_rule.append(mainpage)
+            else:
+                self.next_rule.append((self.rule_id[target], self.rule_id[target]))
+
+        # 행동/규칙 플래그
+        self.drop_off_action = self.action_id.get(config.DROP_OFF_ACTION, NO_RULE)
+        self.action_sets_login = [a in config.LOGIN_ACTIONS for a in action_names]
+        self.action_blocked_anonymous = [
+            a in config.LOGIN_ACTIONS or a in config.ANONYMOUS_BLOCKED_ACTIONS for a in action_names
+        ]
+        self.action_picks_item = [a in config.ITEM_PICK_ACTIONS for a in action_names]
+        self.action_releases_item = [a in config.ITEM_RELEASE_ACTIONS for a in action_names]
+        self.rule_keeps_item = [r in config.ITEM_CONTEXT_RULES for r in rule_names]
+        self.rule_resets_item = [r in config.ITEM_RESET_RULES for r in rule_names]
+
+        # 규칙별 체류 시간 범위
+        default_delay = config.TIME_DELAY_SECONDS['default']
+        self.default_delay = default_delay
+        self.rule_delays = [config.TIME_DELAY_SECONDS.get(r, default_delay) for r in rule_names]
+
+        # 배치(벡터) 엔진용 배열
+        max_actions = max(len(actions) for actions in self.rule_actions)
+        self.cum_matrix = np.ones((len(rule_names), max_actions), dtype=np.float64)
+        self.action_matrix = np.full((len(rule_names), max_actions), NO_RULE, dtype=np.int16)
+        for r, (actions, cum_weights, total) in enumerate(zip(self.rule_actions, self.rule_cum_weights, self.rule_totals)):
+            self.cum_matrix[r, :len(actions)] = np.asarray(cum_weights) / total
+            self.cum_matrix[r, len(actions) - 1] = 1.0
+            self.action_matrix[r, :len(actions)] = actions
+        self.next_rule_array = np.array(self.next_rule, dtype=np.int16)
+        self.delay_low = np.array([d[0] for d in self.rule_delays], dtype=np.float64)
+        self.delay_high = np.array([d[1] for d in self.rule_delays], dtype=np.float64)
+
+
+def validate_rule_tables(config, rule_tables):
+    """확률 합, 전이 누락, 존재하지 않는 규칙 참조 등을 검사해 오류 메시지 목록을 반환"""
+    errors = []
+    for name, table in rule_tables.items():
+        if not table:
+            errors.append(f"{name}: 행동이 비어 있습니다.")
+            continue
+        weights = list(table.values())
+        if any((not isinstance(w, (int, float))) or w < 0 or not math.isfinite(w) for w in weights):
+            errors.append(f"{name}: 확률은 0 이상의 유한한 숫자여야 합니다.")
+            continue
+        total = sum(weights)
+        if abs(total - 1.0) > PROB_TOLERANCE:
+            errors.append(f"{name}: 확률 합이 1이 아닙니다 (합계 {total:.6f}).")
+        for action in table:
+            if action == config.DROP_OFF_ACTION:
+                continue
+            target = config.ACTION_NEXT_RULE.get(action)
+            if target is None:
+                errors.append(f"{name}: 행동 '{action}'의 다음 상태가 ACTION_NEXT_RULE에 없습니다.")
+            elif target != 'MAINPAGE' and target not in rule_tables:
+                errors.append(f"{name}: 행동 '{action}'의 다음 상태 '{target}'가 정의되지 않았습니다.")
+
+    for key, rule in config.MAINPAGE_RULES.items():
+        if rule not in rule_tables:
+            errors.append(f"MAINPAGE_RULES['{key}']: 규칙 '{rule}'가 정의되지 않았습니다.")
+
+    if 'default' not in config.TIME_DELAY_SECONDS:
+        errors.append("TIME_DELAY_SECONDS: 'default' 항목이 없습니다.")
+    for rule, (low, high) in config.TIME_DELAY_SECONDS.items():
+        if rule != 'default' and rule not in rule_tables:
+            errors.append(f"TIME_DELAY_SECONDS: 규칙 '{rule}'가 정의되지 않았습니다.")
+        if low > high:
+            errors.append(f"TIME_DELAY_SECONDS['{rule}']: 최소값이 최대값보다 큽니다.")
+    return errors
+
+
+def compile_transitions(config):
+    """Config를 검증하고 CompiledTransitions로 컴파일 (잘못된 설정이면 ValueError)"""
+    return CompiledTransitions(config)
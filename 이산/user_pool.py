@@ -1,7 +1,13 @@
 import pandas as pd
+import numpy as np
+import argparse
+import os
 import random
+import time
 from datetime import datetime
 
+from user_store import UserPoolStore
+
 # ----------------------------------------------------
 # 1. Config 클래스: 사용자 생성 규칙 정의
 # ----------------------------------------------------
@@ -59,6 +65,11 @@ LOCATIONS_BY_CITY = {
 }
 PROMO_SENSITIVITY_LEVELS = ['high', 'medium', 'low']
 
+# 나이 상한(미만) 별 아이폰 사용 비율, 마지막 구간 이상은 IPHONE_RATIO_DEFAULT
+IPHONE_RATIO_BY_AGE = [(30, 0.6), (40, 0.5), (50, 0.3), (60, 0.1), (70, 0.05)]
+IPHONE_RATIO_DEFAULT = 0.02
+DEVICES = ['Galaxy', 'iPhone']
+
 # ----------------------------------------------------
 # 3. 나이 기반 기기 할당 함수 
 # ----------------------------------------------------
@@ -66,12 +77,11 @@ def get_device_by_age(age):
     """
     나이를 기준으로 갤럭시/아이폰 사용 비율에 따라 기기를 할당합니다.
     """
-    if age < 30: iphone_ratio = 0.6
-    elif age < 40: iphone_ratio = 0.5
-    elif age < 50: iphone_ratio = 0.3
-    elif age < 60: iphone_ratio = 0.1
-    elif age < 70: iphone_ratio = 0.05
-    else: iphone_ratio = 0.02
+    iphone_ratio = IPHONE_RATIO_DEFAULT
+    for upper_age, ratio in IPHONE_RATIO_BY_AGE:
+        if age < upper_age:
+            iphone_ratio = ratio
+            break
         
     return 'iPhone' if random.random() < iphone_ratio else 'Galaxy'
 
@@ -122,22 +132,113 @@ def create_new_user_for_pool(config, user_sequence):
     }
 
 # ----------------------------------------------------
-# 5. 메인 실행 코드
+# 5. 벡터화된 사용자 풀 생성 함수
+# ----------------------------------------------------
+def _draw_codes(rng, weights, n):
+    """가중치(dict 값 순서)에 따라 0..len-1 코드 n개를 한 번에 추출"""
+    weights = np.asarray(weights, dtype=np.float64)
+    cumulative = np.cumsum(weights) / weights.sum()
+    cumulative[-1] = 1.0
+    return np.searchsorted(cumulative, rng.random(n), side='right')
+
+
+def build_user_pool(config, n_users, seed=None):
+    """
+    사용자 풀 전체를 컬럼 단위로 한 번에 생성합니다.
+    create_new_user_for_pool과 같은 분포를 따르며, 범주형 컬럼은 category / 작은 정수 dtype으로 저장합니다.
+    """
+    rng = np.random.default_rng(seed)
+
+    # 성별
+    genders = list(config.GENDER_RATIO.keys())
+    gender_codes = _draw_codes(rng, list(config.GENDER_RATIO.values()), n_users)
+
+    # 나이대 선택 후 나이대 안에서 랜덤 나이
+    age_ranges = np.array(list(config.AGE_DISTRIBUTION.keys()))
+    band = _draw_codes(rng, list(config.AGE_DISTRIBUTION.values()), n_users)
+    min_age, max_age = age_ranges[band, 0], age_ranges[band, 1]
+    ages = (min_age + rng.integers(0, max_age - min_age + 1)).astype(np.uint8)
+
+    # 도시 → 구 (도시 균등, 도시 안에서 구 균등)
+    cities = list(LOCATIONS_BY_CITY.keys())
+    locations = [f"{city} {district}" for city in cities for district in LOCATIONS_BY_CITY[city]]
+    district_counts = np.array([len(LOCATIONS_BY_CITY[city]) for city in cities])
+    city_offsets = np.concatenate([[0], np.cumsum(district_counts)[:-1]])
+    city_codes = rng.integers(0, len(cities), size=n_users)
+    location_codes = city_offsets[city_codes] + (rng.random(n_users) * district_counts[city_codes]).astype(np.int64)
+
+    # 프로모션 민감도, 나이 기반 기기
+    promo_codes = rng.integers(0, len(PROMO_SENSITIVITY_LEVELS), size=n_users)
+    upper_ages = np.array([upper for upper, _ in IPHONE_RATIO_BY_AGE])
+    iphone_ratios = np.array([ratio for _, ratio in IPHONE_RATIO_BY_AGE] + [IPHONE_RATIO_DEFAULT])
+    iphone_ratio = iphone_ratios[np.searchsorted(upper_ages, ages, side='right')]
+    device_codes = (rng.random(n_users) < iphone_ratio).astype(np.int8)  # DEVICES 순서: Galaxy, iPhone
+
+    columns = {
+        'user_id': np.arange(1, n_users + 1, dtype=np.uint32),
+        'gender': pd.Categorical.from_codes(gender_codes, categories=genders),
+        'age': ages,
+        'location': pd.Categorical.from_codes(location_codes, categories=locations),
+        'promo_sensitivity': pd.Categorical.from_codes(promo_codes, categories=PROMO_SENSITIVITY_LEVELS),
+        'device': pd.Categorical.from_codes(device_codes, categories=DEVICES),
+    }
+
+    # 'ever' 카테고리 로직
+    for flag, prob in config.EVER_CATEGORY_PROB_TRUE.items():
+        columns[flag] = rng.random(n_users) < prob
+
+    return pd.DataFrame(columns)
+
+
+def save_user_pool(user_pool_df, csv_path, binary_format='parquet', write_csv=True):
+    """
+    사용자 풀을 CSV(user_id 8자리 0 채움)와 바이너리 파일(Parquet/Feather, dtype 유지)로 저장합니다.
+    바이너리 파일은 CSV와 같은 위치/이름에 확장자만 바꿔 저장하며, 생성기는 이 파일을 우선 로드합니다.
+    ('store'는 user_store.UserPoolStore 디렉터리)
+    """
+    # 생성기가 '바이너리가 CSV보다 최신'인지로 판단하므로 CSV를 먼저 쓴다
+    saved = []
+    if write_csv:
+        csv_df = user_pool_df.assign(user_id=user_pool_df['user_id'].astype(str).str.zfill(8))
+        csv_df.to_csv(csv_path, index=False, encoding='utf-8-sig')
+        saved.append(csv_path)
+    if binary_format:
+        binary_path = f"{os.path.splitext(csv_path)[0]}.{binary_format}"
+        try:
+            if binary_format == 'parquet':
+                user_pool_df.to_parquet(binary_path, index=False)
+            elif binary_format == 'feather':
+                user_pool_df.to_feather(binary_path)
+            elif binary_format == 'store':
+                UserPoolStore.write(user_pool_df, binary_path)
+            else:
+                raise ValueError(f"알 수 없는 바이너리 형식 '{binary_format}' (parquet, feather 또는 store)")
+            saved.append(binary_path)
+        except ImportError:
+            print(f"⚠️ pyarrow가 설치되어 있지 않아 '{binary_path}'를 저장하지 못했습니다.")
+    return saved
+
+# ----------------------------------------------------
+# 6. 메인 실행 코드
 # ----------------------------------------------------
 if __name__ == '__main__':
-    NUMBER_OF_USERS_TO_CREATE = 1000000
-    OUTPUT_CSV_FILE = 'user_pool.csv'
+    parser = argparse.ArgumentParser(description="사용자 풀 생성")
+    parser.add_argument('--users', type=int, default=1000000, help="생성할 사용자 수")
+    parser.add_argument('--output', default='user_pool.csv', help="CSV 경로 (바이너리 파일은 같은 이름으로 저장)")
+    parser.add_argument('--format', default='parquet', choices=['parquet', 'feather', 'store'],
+                        help="바이너리 형식 (store: 메모리 매핑 컬럼 저장소)")
+    parser.add_argument('--no-csv', action='store_true', help="CSV는 쓰지 않고 바이너리 파일만 저장")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
     
     config = Config()
-    user_list = []
-
-    print(f"총 {NUMBER_OF_USERS_TO_CREATE}명의 사용자 데이터 생성을 시작합니다...")
 
-    for i in range(1, NUMBER_OF_USERS_TO_CREATE + 1):
-        new_user = create_new_user_for_pool(config, i)
-        user_list.append(new_user)
+    print(f"총 {args.users}명의 사용자 데이터 생성을 시작합니다...")
 
-    user_pool_df = pd.DataFrame(user_list)
-    user_pool_df.to_csv(OUTPUT_CSV_FILE, index=False, encoding='utf-8-sig')
+    start = time.perf_counter()
+    user_pool_df = build_user_pool(config, args.users, seed=args.seed)
+    print(f"⏱️ 생성 완료: {time.perf_counter() - start:.2f}초")
 
-    
\ No newline at end of file
+    start = time.perf_counter()
+    saved = save_user_pool(user_pool_df, args.output, binary_format=args.format, write_csv=not args.no_csv)
+    print(f"✅ 저장 완료: {', '.join(saved)} ({time.perf_counter() - start:.2f}초)")
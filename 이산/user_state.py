@@ -0,0 +1,196 @@
+import json
+import os
+
+import numpy as np
+
+# 익명 방문자 세션의 user_id (사용자 풀 user_id는 1부터 시작)
+ANONYMOUS_USER_ID = 0
+
+# 상태 배열 이름 → dtype
+STATE_ARRAYS = {
+    'flags': np.uint8,           # ever_* 플래그 비트 (bit i = flag_names[i])
+    'session_count': np.uint32,  # 이번 생성에서의 세션 수
+    'first_day': np.uint16,      # 첫 세션 날짜 (start_day 기준 일 수 + 1, 0 = 아직 없음)
+    'last_day': np.uint16,       # 마지막 세션 날짜 (같은 방식)
+}
+
+# ----------------------------------------------------
+# 1. 유저별 가변 상태 저장소
+# ----------------------------------------------------
+class UserStateStore:
+    """
+    세션이 진행되면서 바뀌는 유저별 상태를 유저 인덱스(샘플링된 유저 위치)로 접근하는 배열에 보관한다.
+
+        flags          uint8   ever_* 플래그를 비트로 묶은 값 (세그먼트 코드의 ever 비트와 같은 순서)
+        session_count  uint32  세션 수 (0이면 이번 생성에서 처음 방문하는 유저)
+        first_day      uint16  첫 세션 날짜, last_day: 마지막 세션 날짜 (start_day + 값 - 1, 0 = 없음)
+
+    유저당 9바이트이므로 1천만 명도 약 90MB이고, 세션 루프에서는 배열 인덱싱 한 번(O(1))으로 읽고 쓴다.
+    플래그는 False → True로만 바뀌고(구매한 책의 카테고리로 결정) 세션 수/날짜도 늘어나기만 하므로
+    여러 구간의 변경분(delta)은 OR / 합 / min / max로 순서와 관계없이 합칠 수 있다 (merge).
+
+    snapshot_dir를 주면 start_day부터 snapshot_days마다 그 날짜 0시 기준 상태를
+    snapshot_dir/user_state-YYYY-MM-DD.npz로 기록한다 (세션 기록은 시간 순서여야 한다).
+    """
+
+    def __init__(self, n_users, flag_names, start_day, initial_flags=None, snapshot_days=7, snapshot_dir=None,
+                 user_ids=None):
+        self.flag_names = list(flag_names)
+        self.start_day = int(start_day)  # epoch 기준 일 수
+        self.snapshot_days = snapshot_days
+        self.snapshot_dir = snapshot_dir
+        self.arrays = {name: np.zeros(n_users, dtype=dtype) for name, dtype in STATE_ARRAYS.items()}
+        if initial_flags is not None:
+            self.arrays['flags'][:] = initial_flags
+        self._next_snapshot_day = self.start_day if snapshot_dir else None
+        if snapshot_dir:
+            self._write_meta(user_ids)
+
+    def __len__(self):
+        return len(self.arrays['flags'])
+
+    @property
+    def flags(self):
+        return self.arrays['flags']
+
+    @property
+    def session_count(self):
+        return self.arrays['session_count']
+
+    def day_offsets(self, days):
+        """epoch 기준 일 수 → 저장 값 (start_day 기준 + 1)"""
+        return np.asarray(days, dtype=np.int64) - self.start_day + 1
+
+    # --- 세션 기록 -----------------------------------------------------------
+    def record_session(self, user, day, flag_bits=0):
+        """scalar 엔진: 유저 1명의 세션 1개 기록 (day: epoch 기준 일 수)"""
+        if self._next_snapshot_day is not None and day >= self._next_snapshot_day:
+            self.snapshot_until(day)
+        arrays = self.arrays
+        offset = day - self.start_day + 1
+        if flag_bits:
+            arrays['flags'][user] |= flag_bits
+        if arrays['session_count'][user] == 0:
+            arrays['first_day'][user] = offset
+        arrays['session_count'][user] += 1
+        arrays['last_day'][user] = offset
+
+    def record_sessions(self, users, days, flag_bits):
+        """batch 엔진: 시간 순서로 정렬된 세션 배열을 한 번에 기록 (같은 유저가 여러 번 나와도 된다)"""
+        users = np.asarray(users, dtype=np.intp)
+        days = np.asarray(days, dtype=np.int64)
+        flag_bits = np.asarray(flag_bits, dtype=np.uint8)
+        while self._next_snapshot_day is not None and len(days) and days[-1] >= self._next_snapshot_day:
+            cut = int(np.searchsorted(days, self._next_snapshot_day, side='left'))
+            self._apply(users[:cut], days[:cut], flag_bits[:cut])
+            users, days, flag_bits = users[cut:], days[cut:], flag_bits[cut:]
+            self.snapshot_until(int(days[0]))
+        self._apply(users, days, flag_bits)
+
+    def _apply(self, users, days, flag_bits):
+        if not len(users):
+            return
+        arrays = self.arrays
+        offsets = self.day_offsets(days).astype(np.uint16)
+        np.bitwise_or.at(arrays['flags'], users, flag_bits)
+        unique, first_index = np.unique(users, return_index=True)
+        new = arrays['session_count'][unique] == 0
+        arrays['first_day'][unique[new]] = offsets[first_index[new]]
+        np.add.at(arrays['session_count'], users, 1)
+        np.maximum.at(arrays['last_day'], users, offsets)
+
+    # --- 병합 (병렬 시간 샤드) -----------------------------------------------
+    def copy_arrays(self):
+        return {name: values.copy() for name, values in self.arrays.items()}
+
+    def load_arrays(self, arrays):
+        """다른 저장소/스냅샷의 상태 배열을 그대로 복사해 온다 (배열 재할당 없음)"""
+        for name, values in self.arrays.items():
+            np.copyto(values, arrays[name])
+
+    def delta(self, base):
+        """base(상태 배열 dict) 이후 바뀐 유저만 담은 변경분"""
+        arrays = self.arrays
+        changed = np.flatnonzero((arrays['flags'] != base['flags']) | (arrays['session_count'] != base['session_count']))
+        return {
+            'users': changed,
+            'flags': arrays['flags'][changed],
+            'session_count': arrays['session_count'][changed] - base['session_count'][changed],
+            'first_day': arrays['first_day'][changed],
+            'last_day': arrays['last_day'][changed],
+        }
+
+    def merge(self, delta):
+        """
+        delta()로 만든 변경분을 합친다. 플래그는 OR, 세션 수는 합, 첫/마지막 날짜는 min/max이므로
+        같은 base에서 출발한 여러 샤드의 변경분을 어떤 순서로 합쳐도 결과가 같다.
+        """
+        arrays = self.arrays
+        users = delta['users']
+        arrays['flags'][users] |= delta['flags']
+        arrays['session_count'][users] += delta['session_count']
+        first = arrays['first_day'][users]
+        delta_first = delta['first_day']
+        arrays['first_day'][users] = np.where((first == 0) | ((delta_first > 0) & (delta_first < first)), delta_first, first)
+        arrays['last_day'][users] = np.maximum(arrays['last_day'][users], delta['last_day'])
+
+    # --- 스냅샷 --------------------------------------------------------------
+    def _write_meta(self, user_ids):
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        meta = {
+            'n_users': len(self),
+            'flag_names': self.flag_names,
+            'start_date': str(np.datetime64(self.start_day, 'D')),
+            'snapshot_days': self.snapshot_days,
+            'day_encoding': 'start_date + value - 1 (0 = no session)',
+        }
+        with open(os.path.join(self.snapshot_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        if user_ids is not None:
+            np.save(os.path.join(self.snapshot_dir, 'user_ids.npy'), np.asarray(user_ids), allow_pickle=False)
+
+    def snapshot_until(self, day):
+        """day 이전에 지나간 스냅샷 경계마다 현재 상태를 기록 (snapshot_dir가 없으면 아무것도 하지 않음)"""
+        while self._next_snapshot_day is not None and day >= self._next_snapshot_day:
+            self.write_snapshot(self._next_snapshot_day)
+            self._next_snapshot_day += self.snapshot_days
+
+    def write_snapshot(self, day):
+        """day(epoch 기준 일 수) 0시 기준 상태를 snapshot_dir에 기록"""
+        if not self.snapshot_dir:
+            return None
+        path = os.path.join(self.snapshot_dir, f"user_state-{np.datetime64(int(day), 'D')}.npz")
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, **self.arrays)
+        os.replace(tmp_path, path)
+        return path
+
+    def finish(self, end_day):
+        """생성 종료: 남은 스냅샷 경계와 종료 시점 상태를 기록"""
+        if self._next_snapshot_day is None:
+            return
+        if end_day > self._next_snapshot_day:
+            self.snapshot_until(end_day - 1)
+        self.write_snapshot(end_day)
+
+    # --- 체크포인트 ----------------------------------------------------------
+    def get_state(self):
+        return {'arrays': self.copy_arrays(), 'next_snapshot_day': self._next_snapshot_day}
+
+    def set_state(self, state):
+        self.load_arrays(state['arrays'])
+        if self._next_snapshot_day is not None and state.get('next_snapshot_day') is not None:
+            self._next_snapshot_day = state['next_snapshot_day']
+
+
+def category_flag_bits(categories, flag_names, flag_categories):
+    """
+    카탈로그 카테고리 코드 → 그 카테고리 책을 구매하면 켜지는 플래그 비트 (uint8 배열).
+    flag_categories는 Config.EVER_FLAG_PURCHASE_CATEGORIES ({플래그: [카테고리, ...]}).
+    """
+    bits = np.zeros(len(categories), dtype=np.uint8)
+    for bit, flag in enumerate(flag_names):
+        for category in flag_categories.get(flag, []):
+            if category in categories:
+                bits[list(categories).index(category)] |= 1 << bit
+    return bits
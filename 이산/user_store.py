@@ -0,0 +1,152 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# ----------------------------------------------------
+# 1. 메모리 매핑 사용자 풀 저장소
+# ----------------------------------------------------
+class UserPoolStore:
+    """
+    사용자 풀을 디렉터리 하나에 컬럼별 고정폭 .npy 파일로 저장하고 메모리 매핑으로 읽는 저장소.
+
+        user_pool.store/
+            meta.json           # 행 수, 컬럼 dtype, 범주 목록
+            user_id.npy         # 정수 user_id ("00013958" 같은 0 채움 문자열도 정수로 저장)
+            gender.npy          # 범주 코드 (int8/int16)
+            age.npy ...
+
+    컬럼은 처음 접근할 때 np.load(mmap_mode='r')로 열리므로 실행에 필요한 컬럼만 읽고,
+    같은 호스트의 여러 생성기 프로세스가 같은 페이지 캐시를 공유한다.
+    """
+
+    META_FILE = 'meta.json'
+
+    def __init__(self, path, meta):
+        self.path = path
+        self.meta = meta
+        self._columns = {}
+
+    def __len__(self):
+        return self.meta['n_users']
+
+    @property
+    def columns(self):
+        return list(self.meta['columns'])
+
+    @classmethod
+    def is_store(cls, path):
+        return os.path.isdir(path) and os.path.exists(os.path.join(path, cls.META_FILE))
+
+    @classmethod
+    def open(cls, path):
+        with open(os.path.join(path, cls.META_FILE), encoding='utf-8') as f:
+            meta = json.load(f)
+        return cls(path, meta)
+
+    @classmethod
+    def write(cls, user_pool_df, path):
+        """DataFrame(user_pool.py 출력 또는 CSV 로드 결과)을 저장소 디렉터리로 저장"""
+        os.makedirs(path, exist_ok=True)
+        meta = {'n_users': len(user_pool_df), 'columns': {}}
+        for column in user_pool_df.columns:
+            values, info = _encode_column(user_pool_df[column], is_user_id=(column == 'user_id'))
+            np.save(os.path.join(path, f"{column}.npy"), values, allow_pickle=False)
+            meta['columns'][column] = info
+        with open(os.path.join(path, cls.META_FILE), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        return cls(path, meta)
+
+    def column(self, name):
+        """컬럼 원본 배열 (범주형이면 코드). 처음 접근할 때 메모리 매핑"""
+        if name not in self._columns:
+            if name not in self.meta['columns']:
+                raise KeyError(f"사용자 풀 저장소에 '{name}' 컬럼이 없습니다.")
+            self._columns[name] = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode='r')
+        return self._columns[name]
+
+    def categories(self, name):
+        """범주형 컬럼의 범주 목록 (범주형이 아니면 None)"""
+        return self.meta['columns'][name].get('categories')
+
+    def decoded(self, name, positions=None):
+        """범주 코드를 값으로 바꾼 배열 (positions가 있으면 해당 행만)"""
+        values = self.column(name)
+        if positions is not None:
+            values = values[positions]
+        categories = self.categories(name)
+        if categories is None:
+            return np.asarray(values)
+        return pd.Categorical.from_codes(values, categories=categories)
+
+    def to_frame(self, positions=None, columns=None):
+        """요청한 컬럼만 디코딩한 DataFrame"""
+        columns = self.columns if columns is None else columns
+        return pd.DataFrame({name: self.decoded(name, positions) for name in columns})
+
+
+def _encode_column(series, is_user_id=False):
+    """컬럼 하나를 고정폭 numpy 배열 + meta 정보로 변환"""
+    if is_user_id:
+        info = {'dtype': 'int'}
+        if series.dtype == object or pd.api.types.is_string_dtype(series):
+            series = series.astype(str).astype(np.int64)
+        values = series.to_numpy(dtype=np.int64)
+        if len(values) and values.min() >= 0 and values.max() < 2 ** 32:
+            values = values.astype(np.uint32)
+        return values, info
+
+    if isinstance(series.dtype, pd.CategoricalDtype) or series.dtype == object or pd.api.types.is_string_dtype(series):
+        categorical = series.astype('category')
+        categories = [str(c) for c in categorical.cat.categories]
+        code_dtype = np.int8 if len(categories) < 127 else np.int16 if len(categories) < 32767 else np.int32
+        return categorical.cat.codes.to_numpy().astype(code_dtype), {'dtype': 'category', 'categories': categories}
+
+    if pd.api.types.is_bool_dtype(series):
+        return series.to_numpy(dtype=bool), {'dtype': 'bool'}
+
+    values = series.to_numpy()
+    if pd.api.types.is_integer_dtype(series) and len(values) and values.min() >= 0 and values.max() < 256:
+        values = values.astype(np.uint8)
+    return values, {'dtype': str(values.dtype)}
+
+# ----------------------------------------------------
+# 2. 프로세스 메모리 사용량
+# ----------------------------------------------------
+def current_rss_mb():
+    """현재 프로세스 RSS (MB, Linux /proc 기준. 읽을 수 없으면 None)"""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / 1e6
+    except (OSError, ValueError, IndexError):
+        return None
+
+# ----------------------------------------------------
+# 3. 메인 실행 코드: CSV/Parquet 사용자 풀 → 저장소 변환
+# ----------------------------------------------------
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="사용자 풀을 메모리 매핑 저장소로 변환")
+    parser.add_argument('source', help="user_pool.csv / user_pool.parquet / user_pool.feather")
+    parser.add_argument('output', nargs='?', help="저장소 디렉터리 (기본: <source 이름>.store)")
+    args = parser.parse_args()
+
+    output = args.output or f"{os.path.splitext(args.source)[0]}.store"
+    ext = os.path.splitext(args.source)[1].lower()
+    start = time.perf_counter()
+    if ext == '.parquet':
+        source_df = pd.read_parquet(args.source)
+    elif ext == '.feather':
+        source_df = pd.read_feather(args.source)
+    elif ext == '.csv':
+        source_df = pd.read_csv(args.source)
+    else:
+        print(f"⚠️ 지원하지 않는 형식입니다: '{args.source}'")
+        sys.exit(1)
+
+    store = UserPoolStore.write(source_df, output)
+    print(f"✅ 저장 완료: '{output}' ({len(store)}명, {time.perf_counter() - start:.2f}초)")